@@ -0,0 +1,51 @@
+"""
+core.py — Definições compartilhadas entre o dashboard (main.py) e o
+gerador do artefato (prep_data.py): classes de risco, paleta e cor do mapa.
+
+Mantidas num único lugar para que o artefato pré-computado e a interface
+nunca divirjam.
+"""
+
+import numpy as np
+
+
+# ── Classes de risco ──────────────────────────────────────────────────────────
+ORDEM = ["🟢 Risco Baixo", "🟡 Risco Médio", "🔴 Risco Alto", "⛔ Crítico", "⚫ Sem Dados"]
+
+# ── Paleta ────────────────────────────────────────────────────────────────────
+CORES = {
+    "🟢 Risco Baixo": "#22c55e",
+    "🟡 Risco Médio": "#ca8a04",
+    "🔴 Risco Alto":  "#ef4444",
+    "⛔ Crítico":     "#991b1b",
+    "⚫ Sem Dados":   "#374151",
+}
+
+BADGE = {
+    "🟢 Risco Baixo": "badge-verde",
+    "🟡 Risco Médio": "badge-amarelo",
+    "🔴 Risco Alto":  "badge-vermelho",
+    "⛔ Crítico":     "badge-critico",
+    "⚫ Sem Dados":   "badge-nd",
+}
+BADGE_LABEL = {
+    "🟢 Risco Baixo": "BAIXO",
+    "🟡 Risco Médio": "MÉDIO",
+    "🔴 Risco Alto":  "ALTO",
+    "⛔ Crítico":     "CRÍTICO",
+    "⚫ Sem Dados":   "S/D",
+}
+
+# Limiares de cor do mapa (>= 35 / 55 / 75) e paleta na ordem dos intervalos
+LIMIARES_COR = np.array([35.0, 55.0, 75.0])
+PALETA_COR   = np.array([
+    CORES["⛔ Crítico"], CORES["🔴 Risco Alto"],
+    CORES["🟡 Risco Médio"], CORES["🟢 Risco Baixo"],
+])
+
+
+def cor_por_score(score):
+    """Cor hex por score (vetorizado). NaN → cor de "Sem Dados"."""
+    s   = np.asarray(score, dtype=float)
+    cor = PALETA_COR[np.searchsorted(LIMIARES_COR, s, side="right")]
+    return np.where(np.isnan(s), CORES["⚫ Sem Dados"], cor)
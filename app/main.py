@@ -5,16 +5,21 @@ Mapa coroplético interativo dos municípios da Paraíba.
 Uso: streamlit run app/main.py
 """
 
+import copy
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import geopandas as gpd
+import shapely
+import streamlit.components.v1 as components
 import folium
 from folium.features import GeoJsonTooltip, GeoJsonPopup
-from streamlit_folium import st_folium
+from core import ORDEM, CORES, BADGE_LABEL
 
 
 st.set_page_config(
@@ -146,72 +151,160 @@ st.markdown("""
 BASE = Path(__file__).resolve().parent
 
 
-# ── Paleta ────────────────────────────────────────────────────────────────────
-CORES = {
-    "🟢 Risco Baixo": "#22c55e",
-    "🟡 Risco Médio": "#ca8a04",
-    "🔴 Risco Alto":  "#ef4444",
-    "⛔ Crítico":     "#991b1b",
-    "⚫ Sem Dados":   "#374151",
-}
-ORDEM = ["🟢 Risco Baixo", "🟡 Risco Médio", "🔴 Risco Alto", "⛔ Crítico", "⚫ Sem Dados"]
-
-BADGE = {
-    "🟢 Risco Baixo": "badge-verde",
-    "🟡 Risco Médio": "badge-amarelo",
-    "🔴 Risco Alto":  "badge-vermelho",
-    "⛔ Crítico":     "badge-critico",
-    "⚫ Sem Dados":   "badge-nd",
-}
-BADGE_LABEL = {
-    "🟢 Risco Baixo": "BAIXO",
-    "🟡 Risco Médio": "MÉDIO",
-    "🔴 Risco Alto":  "ALTO",
-    "⛔ Crítico":     "CRÍTICO",
-    "⚫ Sem Dados":   "S/D",
-}
+# ── Templates HTML (montados uma vez na importação) ───────────────────────────
+KPI_HTML = (
+    '<div class="kpi-block">'
+    '<div class="kpi-label">{label}</div>'
+    '<div class="kpi-value">{valor}</div>'
+    '</div>'
+)
+DIST_ROW_HTML = (
+    '<div class="dist-row">'
+    '<span style="color:{cor};min-width:90px">{rotulo}</span>'
+    '<div class="dist-bar-bg"><div class="dist-bar-fill" '
+    'style="width:{pct:.0f}%;background:{cor}"></div></div>'
+    '<span class="dist-count">{n}</span>'
+    '<span style="color:#334155;font-size:0.68rem;min-width:38px;text-align:right">'
+    '{pct:.0f}%</span>'
+    '</div>'
+)
+STAT_ROW_HTML = (
+    '<div style="display:flex;justify-content:space-between;'
+    'padding:4px 0;border-bottom:1px solid #1e2433;'
+    'font-family:monospace;font-size:0.78rem">'
+    '<span style="color:#64748b">{label}</span>'
+    '<span style="color:#e2e8f0;font-weight:600">{valor}</span>'
+    '</div>'
+)
+PAINEL_HTML = (
+    '<div class="panel-section">'
+    '<div class="panel-title">{titulo}</div>{corpo}'
+    '</div>'
+)
+
 
+# Propriedades serializadas em cada feature do mapa: apenas o que tooltip,
+# popup e style_function leem. O resto do artefato não vai para o navegador.
+CAMPOS_MAPA = [
+    "ente", "score_display", "classificacao", "populacao",
+    "eorcam_raw", "rrestos_nproc_pct", "qsiconfi", "ccauc",
+    "lliq_raw", "autonomia_media",
+    "valor_homologado_display", "n_licitacoes_display",
+    "pct_dispensa_display", "ano_ultima_licitacao_display",
+    "cor",
+]
 
-def cor_por_score(score):
-    if pd.isna(score):  return CORES["⚫ Sem Dados"]
-    if score >= 75:     return CORES["🟢 Risco Baixo"]
-    if score >= 55:     return CORES["🟡 Risco Médio"]
-    if score >= 35:     return CORES["🔴 Risco Alto"]
-    return CORES["⛔ Crítico"]
+
+# Colunas numéricas do artefato — nomes alinhados ao solvency v6.4.0 + PNCP.
+# Indicadores em float32 (exibidos com ≤ 3 casas); contagens/anos em Int32.
+# valor_homologado_total fica em float64: float32 perde reais acima de ~16 mi.
+COLS_FLOAT32 = [
+    "score", "eorcam_raw", "lliq_raw", "rrestos_nproc_pct",
+    "qsiconfi", "ccauc", "autonomia_media",
+    "n_anos_cronicos", "dias_atraso", "decay_fator", "pct_dispensa",
+]
+COLS_INT32     = ["populacao", "n_licitacoes", "ano_ultima_licitacao"]
+COLS_NUMERICAS = COLS_FLOAT32 + COLS_INT32 + ["valor_homologado_total"]
 
 
 # ── Dados ─────────────────────────────────────────────────────────────────────
 @st.cache_data
 def carregar_dados():
-    geo_path = BASE / "data" / "pb_score.geojson"
-    if not geo_path.exists():
-        st.error("❌ pb_score.geojson não encontrado. Execute: python app/prep_data.py")
+    parquet_path = BASE / "data" / "pb_score.parquet"
+    geo_path     = BASE / "data" / "pb_score.geojson"
+    if parquet_path.exists():
+        gdf = gpd.read_parquet(parquet_path)
+    elif geo_path.exists():
+        gdf = gpd.read_file(geo_path)
+    else:
+        st.error("❌ pb_score.parquet não encontrado. Execute: python app/prep_data.py")
         st.stop()
-    gdf = gpd.read_file(geo_path)
-
-    # Colunas fiscais — nomes alinhados ao solvency v6.4.0
-    for col in [
-        "score", "eorcam_raw", "lliq_raw", "rrestos_nproc_pct",
-        "qsiconfi", "ccauc", "autonomia_media", "populacao",
-        "n_anos_cronicos", "dias_atraso", "decay_fator",
-    ]:
-        gdf[col] = pd.to_numeric(gdf.get(col), errors="coerce")
 
-    # Colunas PNCP
-    for col in ["n_licitacoes", "valor_homologado_total",
-                "pct_dispensa", "ano_ultima_licitacao"]:
-        gdf[col] = pd.to_numeric(gdf.get(col), errors="coerce")
+    # Conversão numérica em lote: colunas ausentes viram NaN
+    gdf[COLS_NUMERICAS] = gdf.reindex(columns=COLS_NUMERICAS).apply(
+        pd.to_numeric, errors="coerce"
+    )
+    gdf[COLS_INT32] = gdf[COLS_INT32].round().astype("Int32")
 
     for col in ["dado_suspeito", "alerta_composto",
                 "dado_defasado", "autonomia_critica", "lliq_parcial"]:
         if col in gdf.columns:
             gdf[col] = gdf[col].fillna(False).infer_objects(copy=False)
 
-    gdf["cor"] = gdf["score"].apply(cor_por_score)
+    # Classe como categórica ordenada — isin/value_counts operam nos códigos int8
+    gdf["classificacao"] = pd.Categorical(
+        gdf["classificacao"].fillna("⚫ Sem Dados"), categories=ORDEM, ordered=True
+    )
+
+    # Nome em minúsculas para a busca por substring (sem regex por tecla)
+    gdf["_ente_lower"] = gdf["ente"].fillna("").str.lower()
+
+    # Feature GeoJSON pré-serializada por município — o mapa só concatena strings
+    props = gdf[CAMPOS_MAPA].to_json(
+        orient="records", lines=True, force_ascii=False
+    ).splitlines()
+    geoms = shapely.to_geojson(gdf.geometry.values)
+    gdf["_geojson"] = [
+        f'{{"type":"Feature","properties":{p},"geometry":{g}}}'
+        for p, g in zip(props, geoms)
+    ]
+
+    # float32 só depois de serializar o popup — evita ruído de precisão
+    # (ex.: 92.014 → 92.01399993896484) nos valores exibidos no mapa.
+    gdf[COLS_FLOAT32] = gdf[COLS_FLOAT32].astype("float32")
     return gdf
 
 
-gdf = carregar_dados()
+# Indicadores do painel "Mediana Estadual": rótulo → (coluna, formato)
+INDICADORES_MEDIANA = {
+    "Exec. Orçamentária (%)": ("eorcam_raw",        "{:.1f}%"),
+    "RP Não Proc. (%)":       ("rrestos_nproc_pct", "{:.1f}%"),
+    "Conformidade SICONFI":   ("qsiconfi",           "{:.0%}"),
+    "Lliq / Rec. (RGF A05)":  ("lliq_raw",          "{:.3f}"),
+    "Autonomia Tributária":   ("autonomia_media",    "{:.3f}"),
+}
+
+
+@st.cache_data
+def resumo_estadual():
+    """
+    Agregados que dependem só do dataset completo (não dos filtros):
+    contagem por classe, média/mediana do score e o HTML pronto dos painéis
+    de distribuição e medianas. Calculados uma vez em vez de a cada rerun.
+    """
+    gdf       = carregar_dados()
+    com_score = gdf["score"].dropna()
+    contagem  = gdf["classificacao"].value_counts().reindex(ORDEM, fill_value=0)
+    total     = len(gdf)
+
+    linhas_dist = "".join(
+        DIST_ROW_HTML.format(
+            cor=CORES[classe], rotulo=BADGE_LABEL[classe],
+            n=contagem[classe], pct=contagem[classe] / total * 100,
+        )
+        for classe in ORDEM
+    )
+
+    linhas_stats = []
+    for label, (col, fmt) in INDICADORES_MEDIANA.items():
+        val = gdf[col].median()
+        linhas_stats.append(STAT_ROW_HTML.format(
+            label=label, valor=fmt.format(val) if pd.notna(val) else "—",
+        ))
+
+    return {
+        "contagem":     contagem,
+        "media":        com_score.mean(),
+        "mediana":      com_score.median(),
+        "painel_dist":  PAINEL_HTML.format(titulo="Distribuição por Faixa de Risco",
+                                           corpo=linhas_dist),
+        "painel_stats": PAINEL_HTML.format(titulo="Indicadores — Mediana Estadual",
+                                           corpo="".join(linhas_stats)),
+    }
+
+
+gdf    = carregar_dados()
+resumo = resumo_estadual()
 
 
 # ── Sidebar ───────────────────────────────────────────────────────────────────
@@ -253,75 +346,30 @@ with st.sidebar:
 
 
 # ── Filtros ───────────────────────────────────────────────────────────────────
-gdf_f = gdf[gdf["classificacao"].isin(classes_selecionadas)].copy()
-mask = (
-    gdf_f["score"].isna() |
-    ((gdf_f["score"] >= score_min) & (gdf_f["score"] <= score_max))
-)
-gdf_f = gdf_f[mask]
-if busca.strip():
-    gdf_f = gdf_f[gdf_f["ente"].str.contains(busca.strip(), case=False, na=False)]
-
-
-# ── Cabeçalho ─────────────────────────────────────────────────────────────────
-st.markdown("""
-<div class="inst-header">
-    <h1>Capacidade de Pagamento dos Municípios — Paraíba</h1>
-    <p>SCORE DE SOLVÊNCIA · 223 MUNICÍPIOS · REFERÊNCIA 2020–2025 · FASE 0</p>
-</div>
-""", unsafe_allow_html=True)
-
-
-# ── KPIs ──────────────────────────────────────────────────────────────────────
-com_score = gdf["score"].dropna()
-n_baixo   = (gdf["classificacao"] == "🟢 Risco Baixo").sum()
-n_alto    = ((gdf["classificacao"] == "🔴 Risco Alto") |
-             (gdf["classificacao"] == "⛔ Crítico")).sum()
-n_nd      = (gdf["classificacao"] == "⚫ Sem Dados").sum()
-
-k1, k2, k3, k4, k5 = st.columns(5)
-for col, label, val in [
-    (k1, "Score Médio PB",    f"{com_score.mean():.1f}"),
-    (k2, "Score Mediano",     f"{com_score.median():.1f}"),
-    (k3, "Risco Baixo",       str(n_baixo)),
-    (k4, "Alto + Crítico",    str(n_alto)),
-    (k5, "Sem Dados SICONFI", str(n_nd)),
-]:
-    col.markdown(
-        f'<div class="kpi-block">'
-        f'<div class="kpi-label">{label}</div>'
-        f'<div class="kpi-value">{val}</div>'
-        f'</div>',
-        unsafe_allow_html=True,
+def filtrar(gdf, classes, score_min, score_max, busca):
+    """Aplica os filtros da sidebar. `busca` já chega normalizada (strip + lower)."""
+    # Máscara única avaliada em NumPy; o fatiamento final não copia colunas
+    # à toa porque o resultado é só lido (mapa e tabela).
+    s    = gdf["score"].to_numpy()
+    mask = (
+        gdf["classificacao"].isin(classes).to_numpy() &
+        (np.isnan(s) | ((s >= score_min) & (s <= score_max)))
     )
+    if busca:
+        mask = mask & np.fromiter(
+            (busca in e for e in gdf["_ente_lower"]), dtype=bool, count=len(gdf)
+        )
+    return gdf[mask]
 
-st.markdown("<div style='margin-top:18px'></div>", unsafe_allow_html=True)
-
-
-# ── Mapa + Painel ─────────────────────────────────────────────────────────────
-col_mapa, col_painel = st.columns([3, 2])
 
-with col_mapa:
-    m = folium.Map(
-        location=[-7.1, -36.8],
-        zoom_start=7,
-        tiles="CartoDB dark_matter",
-        prefer_canvas=True,
-    )
+busca_norm = busca.strip().lower()
+gdf_f      = filtrar(gdf, classes_selecionadas, score_min, score_max, busca_norm)
 
-    def estilo(feature):
-        try:    s = float(feature["properties"].get("score"))
-        except: s = None
-        return {
-            "fillColor":   cor_por_score(s),
-            "color":       "#0f1117",
-            "weight":      0.5,
-            "fillOpacity": 0.85,
-        }
-
-    def hover(_):
-        return {"fillOpacity": 1.0, "weight": 2, "color": "#94a3b8"}
 
+# ── Mapa (HTML cacheado por combinação de filtros) ───────────────────────────
+@st.cache_resource
+def componentes_mapa():
+    """Tooltip e popup não dependem dos filtros — construídos uma vez por processo."""
     tooltip = GeoJsonTooltip(
         fields=["ente", "score_display", "classificacao"],
         aliases=["Município", "Score", "Classificação"],
@@ -358,9 +406,49 @@ with col_mapa:
         ),
         max_width=300,
     )
+    return tooltip, popup
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def construir_mapa(classes, score_min, score_max, busca_norm):
+    """
+    Monta o mapa Folium para os filtros informados e devolve o HTML renderizado.
+    A chave do cache é a própria tupla de filtros — reruns sem mudança de filtro
+    não reconstroem GeoJSON, tooltip nem popup.
+    """
+    gdf_f = filtrar(carregar_dados(), classes, score_min, score_max, busca_norm)
+
+    # prefer_canvas: o renderer Canvas do Leaflet já recorta (clip) e ignora
+    # polígonos fora do viewport a cada pan/zoom — o culling fica no cliente.
+    m = folium.Map(
+        location=[-7.1, -36.8],
+        zoom_start=7,
+        tiles="CartoDB dark_matter",
+        prefer_canvas=True,
+    )
+
+    def estilo(feature):
+        return {
+            "fillColor":   feature["properties"]["cor"],
+            "color":       "#0f1117",
+            "weight":      0.5,
+            "fillOpacity": 0.85,
+        }
+
+    def hover(_):
+        return {"fillOpacity": 1.0, "weight": 2, "color": "#94a3b8"}
+
+    # Cópias rasas: cada GeoJson vira _parent do seu tooltip/popup
+    tooltip, popup = (copy.copy(c) for c in componentes_mapa())
+
+    feature_collection = (
+        '{"type":"FeatureCollection","features":['
+        + ",".join(gdf_f["_geojson"])
+        + "]}"
+    )
 
     folium.GeoJson(
-        gdf_f.__geo_interface__,
+        feature_collection,
         style_function=estilo,
         highlight_function=hover,
         tooltip=tooltip,
@@ -368,55 +456,54 @@ with col_mapa:
         name="Municípios PB",
     ).add_to(m)
 
-    st_folium(m, width="100%", height=560, returned_objects=[])
+    return m.get_root().render()
 
 
-with col_painel:
-    st.markdown('<div class="panel-section">'
-                '<div class="panel-title">Distribuição por Faixa de Risco</div>',
-                unsafe_allow_html=True)
-    dist  = gdf["classificacao"].value_counts().reindex(ORDEM, fill_value=0)
-    total = len(gdf)
-    for classe in ORDEM:
-        n   = dist.get(classe, 0)
-        pct = n / total * 100
-        cor = CORES[classe]
-        st.markdown(
-            f'<div class="dist-row">'
-            f'<span style="color:{cor};min-width:90px">{BADGE_LABEL[classe]}</span>'
-            f'<div class="dist-bar-bg"><div class="dist-bar-fill" '
-            f'style="width:{pct:.0f}%;background:{cor}"></div></div>'
-            f'<span class="dist-count">{n}</span>'
-            f'<span style="color:#334155;font-size:0.68rem;min-width:38px;text-align:right">'
-            f'{pct:.0f}%</span>'
-            f'</div>',
-            unsafe_allow_html=True,
-        )
-    st.markdown('</div>', unsafe_allow_html=True)
+# ── Cabeçalho ─────────────────────────────────────────────────────────────────
+st.markdown("""
+<div class="inst-header">
+    <h1>Capacidade de Pagamento dos Municípios — Paraíba</h1>
+    <p>SCORE DE SOLVÊNCIA · 223 MUNICÍPIOS · REFERÊNCIA 2020–2025 · FASE 0</p>
+</div>
+""", unsafe_allow_html=True)
 
-    st.markdown('<div class="panel-section">'
-                '<div class="panel-title">Indicadores — Mediana Estadual</div>',
-                unsafe_allow_html=True)
-    stats = {
-        "Exec. Orçamentária (%)": ("eorcam_raw",        "{:.1f}%"),
-        "RP Não Proc. (%)":       ("rrestos_nproc_pct", "{:.1f}%"),
-        "Conformidade SICONFI":   ("qsiconfi",           "{:.0%}"),
-        "Lliq / Rec. (RGF A05)":  ("lliq_raw",          "{:.3f}"),
-        "Autonomia Tributária":   ("autonomia_media",    "{:.3f}"),
-    }
-    for label, (col, fmt) in stats.items():
-        val = gdf[col].median()
-        val_str = fmt.format(val) if pd.notna(val) else "—"
-        st.markdown(
-            f'<div style="display:flex;justify-content:space-between;'
-            f'padding:4px 0;border-bottom:1px solid #1e2433;'
-            f'font-family:monospace;font-size:0.78rem">'
-            f'<span style="color:#64748b">{label}</span>'
-            f'<span style="color:#e2e8f0;font-weight:600">{val_str}</span>'
-            f'</div>',
-            unsafe_allow_html=True,
-        )
-    st.markdown('</div>', unsafe_allow_html=True)
+
+# ── KPIs ──────────────────────────────────────────────────────────────────────
+contagem  = resumo["contagem"]
+n_baixo   = contagem["🟢 Risco Baixo"]
+n_alto    = contagem["🔴 Risco Alto"] + contagem["⛔ Crítico"]
+n_nd      = contagem["⚫ Sem Dados"]
+
+k1, k2, k3, k4, k5 = st.columns(5)
+for col, label, val in [
+    (k1, "Score Médio PB",    f"{resumo['media']:.1f}"),
+    (k2, "Score Mediano",     f"{resumo['mediana']:.1f}"),
+    (k3, "Risco Baixo",       str(n_baixo)),
+    (k4, "Alto + Crítico",    str(n_alto)),
+    (k5, "Sem Dados SICONFI", str(n_nd)),
+]:
+    col.markdown(KPI_HTML.format(label=label, valor=val), unsafe_allow_html=True)
+
+st.markdown("<div style='margin-top:18px'></div>", unsafe_allow_html=True)
+
+
+# ── Mapa + Painel ─────────────────────────────────────────────────────────────
+col_mapa, col_painel = st.columns([3, 2])
+
+with col_mapa:
+    # Injeção HTML unidirecional — sem a ponte bidirecional do st_folium,
+    # pan/zoom não geram tráfego de estado de volta para o Python.
+    components.html(
+        construir_mapa(tuple(classes_selecionadas), score_min, score_max, busca_norm),
+        height=560,
+        scrolling=False,
+    )
+
+
+with col_painel:
+    # Painéis dependem só do dataset completo — HTML vem pronto do resumo cacheado
+    st.markdown(resumo["painel_dist"],  unsafe_allow_html=True)
+    st.markdown(resumo["painel_stats"], unsafe_allow_html=True)
 
 
 # ── Tabela completa ───────────────────────────────────────────────────────────
@@ -425,31 +512,33 @@ st.markdown('<div class="panel-title" style="margin-bottom:8px">'
             'DADOS COMPLETOS — MUNICÍPIOS FILTRADOS</div>',
             unsafe_allow_html=True)
 
+# Colunas *_fmt já vêm formatadas do prep_data — aqui é só fatiar e renomear
 df_tabela = (
     gdf_f[[
-        "ente", "score", "classificacao", "populacao",
-        "eorcam_raw", "rrestos_nproc_pct", "qsiconfi", "ccauc",
-        "lliq_raw", "autonomia_media", "dado_suspeito",
+        "ente", "score", "score_fmt", "classificacao", "populacao",
+        "eorcam_raw_fmt", "rrestos_nproc_pct_fmt", "qsiconfi_fmt", "ccauc_fmt",
+        "lliq_raw_fmt", "autonomia_media_fmt", "dado_suspeito",
         # ── dados PNCP ────────────────────────────────────────────────────────
         "n_licitacoes", "valor_homologado_total", "pct_dispensa",
     ]]
     .dropna(subset=["score"])
     .sort_values("score", ascending=False)
+    .drop(columns="score")
     .reset_index(drop=True)
 )
 df_tabela.index += 1
 
 df_tabela = df_tabela.rename(columns={
     "ente":                   "Município",
-    "score":                  "Score",
+    "score_fmt":              "Score",
     "classificacao":          "Risco",
     "populacao":              "Pop.",
-    "eorcam_raw":             "Exec.Orç.%",
-    "rrestos_nproc_pct":      "RP NPrc.%",
-    "qsiconfi":               "SICONFI",
-    "ccauc":                  "CAUC",
-    "lliq_raw":               "Lliq",
-    "autonomia_media":        "Autonomia",
+    "eorcam_raw_fmt":         "Exec.Orç.%",
+    "rrestos_nproc_pct_fmt":  "RP NPrc.%",
+    "qsiconfi_fmt":           "SICONFI",
+    "ccauc_fmt":              "CAUC",
+    "lliq_raw_fmt":           "Lliq",
+    "autonomia_media_fmt":    "Autonomia",
     "dado_suspeito":          "⚑ Suspeito",
     # ── PNCP ──────────────────────────────────────────────────────────────────
     "n_licitacoes":           "Licitações",
@@ -457,20 +546,6 @@ df_tabela = df_tabela.rename(columns={
     "pct_dispensa":           "% Dispensa",
 })
 
-for col, fmt in [
-    ("Exec.Orç.%", "{:.1f}"),
-    ("RP NPrc.%",  "{:.1f}"),
-    ("SICONFI",    "{:.0%}"),
-    ("CAUC",       "{:.2f}"),
-    ("Lliq",       "{:.3f}"),
-    ("Autonomia",  "{:.3f}"),
-    ("Score",      "{:.1f}"),
-]:
-    if col in df_tabela.columns:
-        df_tabela[col] = df_tabela[col].apply(
-            lambda x, f=fmt: f.format(x) if pd.notna(x) else "—"
-        )
-
 st.dataframe(
     df_tabela,
     use_container_width=True,
@@ -2,7 +2,8 @@
 """
 prep_data.py
 Baixa o GeoJSON dos municípios da PB e faz merge com score_municipios_pb_pncp.csv.
-Gera app/data/pb_score.geojson — arquivo consumido pelo dashboard Streamlit.
+Gera app/data/pb_score.parquet (GeoParquet, lido pelo dashboard Streamlit)
+e app/data/pb_score.geojson (mesmo conteúdo, formato legível).
 
 Deve rodar sempre que o pncp_agregador for reprocessado (etapa 'app' do pipeline).
 
@@ -10,24 +11,96 @@ Uso direto:
     python app/prep_data.py
 """
 
+import io
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
 
 import pandas as pd
 import geopandas as gpd
+import shapely
+import pyogrio
 import requests
 from utils.paths import OUTPUTS
+from core import cor_por_score
 
 BASE = Path(__file__).resolve().parent
 CSV  = OUTPUTS / "score_municipios_pb_pncp.csv"
 OUT  = BASE / "data" / "pb_score.geojson"
+OUT_PARQUET = BASE / "data" / "pb_score.parquet"
 
 GEOJSON_URL = (
     "https://raw.githubusercontent.com/tbrugz/geodata-br/"
     "master/geojson/geojs-25-mun.json"
 )
 
+# Formato de exibição de cada coluna da tabela do dashboard → coluna "<col>_fmt"
+FORMATOS_TABELA = {
+    "score":             "{:.1f}",
+    "eorcam_raw":        "{:.1f}",
+    "rrestos_nproc_pct": "{:.1f}",
+    "qsiconfi":          "{:.0%}",
+    "ccauc":             "{:.2f}",
+    "lliq_raw":          "{:.3f}",
+    "autonomia_media":   "{:.3f}",
+}
+
+# Tolerância de simplificação (graus) — ~100 m, imperceptível no zoom 7 do mapa
+SIMPLIFY_TOL = 0.001
+
+
+def fmt_valor(v):
+    if pd.isna(v):             return "—"
+    if v >= 1_000_000_000:     return f"R$ {v/1_000_000_000:.1f} bi"
+    if v >= 1_000_000:         return f"R$ {v/1_000_000:.1f} mi"
+    return f"R$ {v:,.0f}"
+
+
+def campos_derivados(merged: pd.DataFrame) -> pd.DataFrame:
+    """
+    Congela no artefato tudo que o dashboard só exibe: cor do mapa, textos
+    de popup, colunas formatadas da tabela e o alerta composto.
+    O app não faz formatação numérica em tempo de requisição.
+    """
+    merged["classificacao"] = merged["classificacao"].fillna("⚫ Sem Dados")
+    merged["cor"]           = cor_por_score(pd.to_numeric(merged["score"], errors="coerce"))
+
+    # ── Popup do mapa ─────────────────────────────────────────────────────────
+    merged["score_display"] = merged["score"].apply(
+        lambda x: f"{x:.1f}" if pd.notna(x) else "—"
+    )
+
+    merged["valor_homologado_display"] = merged["valor_homologado_total"].apply(fmt_valor)
+
+    merged["n_licitacoes_display"] = merged["n_licitacoes"].apply(
+        lambda x: f"{int(x):,}".replace(",", ".") if pd.notna(x) else "—"
+    )
+
+    merged["pct_dispensa_display"] = merged["pct_dispensa"].apply(
+        lambda x: f"{x*100:.1f}%" if pd.notna(x) else "—"
+    )
+
+    merged["ano_ultima_licitacao_display"] = merged["ano_ultima_licitacao"].apply(
+        lambda x: str(int(x)) if pd.notna(x) else "—"
+    )
+
+    # ── Tabela do dashboard ───────────────────────────────────────────────────
+    for col, fmt in FORMATOS_TABELA.items():
+        merged[f"{col}_fmt"] = (
+            pd.to_numeric(merged[col], errors="coerce")
+            .map(fmt.format, na_action="ignore")
+            .fillna("—")
+        )
+
+    # ── Alerta composto ───────────────────────────────────────────────────────
+    alerta_dispensa = merged["alerta_dispensa"].fillna(False).infer_objects(copy=False)
+    lliq_neg        = (merged["lliq_raw"].fillna(0) < 0)
+    dado_suspeito   = merged["dado_suspeito"].fillna(False).infer_objects(copy=False)
+
+    merged["alerta_composto"] = alerta_dispensa | lliq_neg | dado_suspeito
+    return merged
+
 
 def run() -> None:
     """
@@ -48,7 +121,8 @@ def run() -> None:
     r = requests.get(GEOJSON_URL, timeout=30)
     r.raise_for_status()
 
-    geo = gpd.read_file(r.text, driver="GeoJSON")
+    # Bytes direto para o OGR via pyogrio (leitor Arrow), sem decodificar texto
+    geo = pyogrio.read_dataframe(io.BytesIO(r.content), use_arrow=True)
     print(f"  {len(geo)} polígonos carregados")
 
     # ── Normalizar cod_ibge ───────────────────────────────────────────────────
@@ -64,46 +138,26 @@ def run() -> None:
     print(f"  {merged['score'].notna().sum()} municípios com score após merge")
     print(f"  {merged['score'].isna().sum()} sem score")
 
-    # ── Campos de display ─────────────────────────────────────────────────────
-    merged["classificacao"] = merged["classificacao"].fillna("⚫ Sem Dados")
-
-    merged["score_display"] = merged["score"].apply(
-        lambda x: f"{x:.1f}" if pd.notna(x) else "—"
-    )
-
-    def fmt_valor(v):
-        if pd.isna(v):             return "—"
-        if v >= 1_000_000_000:     return f"R$ {v/1_000_000_000:.1f} bi"
-        if v >= 1_000_000:         return f"R$ {v/1_000_000:.1f} mi"
-        return f"R$ {v:,.0f}"
-
-    merged["valor_homologado_display"] = merged["valor_homologado_total"].apply(fmt_valor)
+    # ── Simplificação de geometria ────────────────────────────────────────────
+    # Menos vértices = menos bytes enviados ao navegador e render mais rápido
+    # no Leaflet. preserve_topology evita polígonos inválidos/colapsados.
+    n_antes = shapely.get_num_coordinates(merged.geometry.values).sum()
+    merged["geometry"] = merged.geometry.simplify(SIMPLIFY_TOL, preserve_topology=True)
+    n_depois = shapely.get_num_coordinates(merged.geometry.values).sum()
+    print(f"  Vértices: {n_antes:,} → {n_depois:,} (tol={SIMPLIFY_TOL})")
 
-    merged["n_licitacoes_display"] = merged["n_licitacoes"].apply(
-        lambda x: f"{int(x):,}".replace(",", ".") if pd.notna(x) else "—"
-    )
-
-    merged["pct_dispensa_display"] = merged["pct_dispensa"].apply(
-        lambda x: f"{x*100:.1f}%" if pd.notna(x) else "—"
-    )
-
-    merged["ano_ultima_licitacao_display"] = merged["ano_ultima_licitacao"].apply(
-        lambda x: str(int(x)) if pd.notna(x) else "—"
-    )
-
-    # ── Alerta composto ───────────────────────────────────────────────────────
-    alerta_dispensa = merged["alerta_dispensa"].fillna(False).infer_objects(copy=False)
-    lliq_neg        = (merged["lliq_raw"].fillna(0) < 0)
-    dado_suspeito   = merged["dado_suspeito"].fillna(False).infer_objects(copy=False)
-
-    merged["alerta_composto"] = alerta_dispensa | lliq_neg | dado_suspeito
+    merged = campos_derivados(merged)
 
     # ── Exportar ──────────────────────────────────────────────────────────────
     OUT.parent.mkdir(parents=True, exist_ok=True)
     merged.to_file(OUT, driver="GeoJSON")
+    # GeoParquet — leitura colunar (pyarrow) no cold start do dashboard;
+    # o GeoJSON fica como artefato legível.
+    merged.to_parquet(OUT_PARQUET)
 
     colunas_finais = [c for c in merged.columns if c != "geometry"]
     print(f"\n✅ GeoJSON salvo em {OUT}")
+    print(f"✅ GeoParquet salvo em {OUT_PARQUET}")
     print(f"   {len(colunas_finais)} colunas | {len(merged)} municípios")
 
 
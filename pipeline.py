@@ -170,7 +170,7 @@ def etapa_app() -> None:
     print("  ETAPA: APP — GeoJSON")
     print("═" * 55)
 
-    print("\n[1/1] Gerando pb_score.geojson...")
+    print("\n[1/1] Gerando pb_score.parquet / pb_score.geojson...")
     prep_data = _importar_prep_data()
     prep_data.run()
 
@@ -194,12 +194,17 @@ def calcular_score(lliq_n, eorcam_n, qsiconfi_n, rproc_n,
     era        = "completa" if lliq_n is not None else "parcial"
     return round(score, 2), era
 
-def classificar(score):
-    """Limiares v7.0: ≥80 Baixo | ≥60 Médio | ≥40 Alto | <40 Crítico."""
-    if   score >= 80: return "BAIXO"
-    elif score >= 60: return "MEDIO"
-    elif score >= 40: return "ALTO"
-    else:             return "CRITICO"
+def classificar(scores):
+    """
+    Limiares v7.0: ≥80 Baixo | ≥60 Médio | ≥40 Alto | <40 Crítico.
+    Classifica a coluna inteira num pd.cut (intervalos fechados à esquerda).
+    """
+    return pd.cut(
+        scores,
+        bins=[-np.inf, 40, 60, 80, np.inf],
+        labels=["CRITICO", "ALTO", "MEDIO", "BAIXO"],
+        right=False,
+    ).astype(object)
 
 # ── Construção dos pares walk-forward ─────────────────────────────────────────
 PARES_ANOS = [
@@ -225,6 +230,10 @@ def construir_pares(df, incluir_rproc=True, excluir_t0=None):
 
     parciais_2025 = set(df.loc[(df["ano"] == 2025) & df["periodo_rgf"].isna(), "cod_ibge"])
 
+    # Histórico de cada município separado uma vez (um único groupby), em
+    # vez de filtrar o frame inteiro por cod_ibge a cada par
+    por_mun = dict(tuple(df.groupby("cod_ibge", sort=False)))
+
     registros = []
     for t0, t1 in PARES_ANOS:
         if t0 in excluir_t0:
@@ -241,7 +250,7 @@ def construir_pares(df, incluir_rproc=True, excluir_t0=None):
             if t1 == 2025 and cod in parciais_2025: continue
             if pd.isna(rproc_t1):                   continue
 
-            df_mun = df[df["cod_ibge"] == cod]
+            df_mun = por_mun[cod]
 
             eorcam_w = eorcam_ponderado(df_mun, t0)
             eorcam_n = score_eorcam(eorcam_w)
@@ -252,7 +261,7 @@ def construir_pares(df, incluir_rproc=True, excluir_t0=None):
 
             anos_janela    = list(range(2020, t0 + 1))
             anos_entregues = int(df_mun[
-                df_mun["ano"].isin(anos_janela) & (df_mun["entregou_rreo"] == True)
+                df_mun["ano"].isin(anos_janela) & df_mun["entregou_rreo"]
             ].shape[0])
             qsiconfi_n = score_qsiconfi(anos_entregues, len(anos_janela))
 
@@ -276,7 +285,6 @@ def construir_pares(df, incluir_rproc=True, excluir_t0=None):
                 "ano_t1":        t1,
                 "era":           era,
                 "score_t0":      score,
-                "classe_t0":     classificar(score),
                 "lliq_raw":      lliq_raw,
                 "lliq_norm":     lliq_n,
                 "eorcam_w":      round(eorcam_w, 2) if eorcam_w is not None else None,
@@ -289,7 +297,11 @@ def construir_pares(df, incluir_rproc=True, excluir_t0=None):
                 "dado_suspeito": suspeito,
             })
 
-    return pd.DataFrame(registros)
+    pares = pd.DataFrame(registros)
+    if not pares.empty:
+        pares.insert(pares.columns.get_loc("score_t0") + 1,
+                     "classe_t0", classificar(pares["score_t0"]))
+    return pares
 
 # ── Análises estatísticas ──────────────────────────────────────────────────────
 def analise_spearman(pares, label):
@@ -476,10 +488,15 @@ def main():
         print(f"[ERRO] {SICONFI_PATH} nao encontrado.")
         sys.exit(1)
 
-    df = pd.read_csv(SICONFI_PATH)
-    df["entregou_rreo"] = df["entregou_rreo"].map(
-        {True: True, False: False, "True": True, "False": False}
-    ).fillna(False)
+    # entregou_rreo tipado pelo parser ("true" do COPY do DuckDB ou "True"
+    # de CSVs gravados pelo pandas). Lido como boolean anulável: célula vazia
+    # faria dtype=bool falhar; sem registro de entrega conta como não entregue
+    df = pd.read_csv(
+        SICONFI_PATH,
+        dtype={"entregou_rreo": "boolean"},
+        true_values=["True", "true"], false_values=["False", "false"],
+    )
+    df["entregou_rreo"] = df["entregou_rreo"].fillna(False).astype(bool)
 
     print(f"[OK] {len(df)} registros | {df['cod_ibge'].nunique()} municipios | "
           f"anos: {sorted(df['ano'].unique())}")
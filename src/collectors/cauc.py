@@ -11,13 +11,16 @@ Rodar individualmente:
 """
 
 import pandas as pd
-import requests
-import io
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import httpx
+import gzip
+import mmap
+import csv
+import shutil
 from pathlib import Path
 from datetime import date
-import urllib3
-
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # ── Diretórios ─────────────────────────────────────────────────────────────────
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -27,6 +30,10 @@ RAW_DIR.mkdir(parents=True, exist_ok=True)
 TABELA = BASE_DIR / "data" / "processed" / "municipios_pb_tabela.csv"
 HOJE   = date.today().strftime("%Y-%m-%d")
 
+# Streaming: tamanho dos pedaços de rede/gzip e do bloco do parser Arrow
+CHUNK_BYTES  = 1 << 16
+BLOCO_BYTES  = 1 << 20
+
 URL_CAUC_BULK = (
     "https://www.tesourotransparente.gov.br/ckan/dataset/"
     "72b5f371-0c35-4613-8076-c99c821a6410/resource/"
@@ -35,13 +42,89 @@ URL_CAUC_BULK = (
 )
 
 
+def _baixar_snapshot(destino: Path) -> None:
+    """
+    Grava o CSV nacional em destino (.csv.gz) à medida que chega do socket —
+    o corpo nunca fica inteiro em memória.
+    """
+    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+    parcial = destino.with_suffix(".part")
+    with httpx.stream("GET", URL_CAUC_BULK, headers=headers, verify=False,
+                      timeout=60, follow_redirects=True) as resp, \
+         gzip.open(parcial, "wb", compresslevel=6) as out:
+        resp.raise_for_status()
+        for pedaco in resp.iter_bytes(CHUNK_BYTES):
+            out.write(pedaco)
+    parcial.replace(destino)
+
+
+def _ler_pb_enc(snapshot: Path, ibges_pb: set[str],
+                enc: str) -> tuple[pd.DataFrame, str, int]:
+    """
+    Lê o snapshot em blocos com o encoding dado e mantém só as linhas PB.
+    Só as 4 linhas de metadados/cabeçalho são decodificadas em Python; o
+    corpo vai em bytes para o pyarrow, que valida/transcodifica por bloco.
+    O .gz é mapeado em memória: releituras (fallback de encoding, reexecução
+    no mesmo dia) saem do page cache sem cópias via read().
+    Retorna (df_pb, data_pesquisa, n_linhas_brasil).
+    """
+    with open(snapshot, "rb") as f, \
+         mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+         gzip.GzipFile(fileobj=mm) as buf:
+
+        def _linha() -> str:
+            return buf.readline().decode(enc).lstrip("\ufeff").rstrip("\r\n")
+
+        # ── Extrai data da pesquisa do cabeçalho ──────────────────────────────
+        data_pesquisa = _linha().strip().replace('"', '').replace('Data da Pesquisa: ', '')
+
+        # Primeiras 3 linhas são metadados do Tesouro; a 4ª é o cabeçalho.
+        # Com os nomes em mãos, todas as colunas são lidas como texto (o código
+        # IBGE não pode virar inteiro) e vazios continuam strings vazias.
+        _linha(), _linha()
+        colunas = next(csv.reader([_linha()], delimiter=";"))
+        col_ibge = next((c for c in colunas if "ibge" in c.lower()), None)
+        if not col_ibge:
+            raise ValueError(f"Coluna IBGE não encontrada. Colunas: {colunas}")
+
+        # ── Parse em blocos (pyarrow) + filtragem para Paraíba ────────────────
+        leitor = pacsv.open_csv(
+            buf,
+            read_options=pacsv.ReadOptions(column_names=colunas, encoding=enc,
+                                           block_size=BLOCO_BYTES),
+            parse_options=pacsv.ParseOptions(delimiter=";"),
+            convert_options=pacsv.ConvertOptions(
+                column_types={c: pa.string() for c in colunas},
+                strings_can_be_null=False,
+            ),
+        )
+
+        alvo = pa.array(sorted(ibges_pb), type=pa.string())
+        blocos_pb, n_brasil = [], 0
+        for bloco in leitor:
+            n_brasil += bloco.num_rows
+            blocos_pb.append(bloco.filter(pc.is_in(bloco.column(col_ibge), value_set=alvo)))
+
+    df_pb = pa.Table.from_batches(blocos_pb, schema=leitor.schema).to_pandas()
+    return df_pb, data_pesquisa, n_brasil
+
+
+def _ler_pb(snapshot: Path, ibges_pb: set[str]) -> tuple[pd.DataFrame, str, int]:
+    """UTF-8 (BOM opcional) primeiro; se o pyarrow rejeitar os bytes, ISO-8859-1."""
+    try:
+        return _ler_pb_enc(snapshot, ibges_pb, "utf8")
+    except (UnicodeDecodeError, pa.ArrowInvalid):
+        return _ler_pb_enc(snapshot, ibges_pb, "iso-8859-1")
+
+
 def run() -> pd.DataFrame:
     """
     Baixa o CSV nacional do CAUC, filtra municípios PB e salva raw.
 
     Outputs:
-        raw/cauc/cauc_raw_pb_{HOJE}.csv  — snapshot datado
-        raw/cauc/cauc_raw_pb.csv         — latest (sobrescrito a cada coleta)
+        raw/cauc/cauc_snapshot_{HOJE}.csv.gz — CSV nacional como baixado
+        raw/cauc/cauc_raw_pb_{HOJE}.csv      — snapshot datado
+        raw/cauc/cauc_raw_pb.csv / .parquet  — latest (sobrescrito a cada coleta)
 
     Retorna o DataFrame bruto filtrado (todas as colunas originais do CKAN
     + data_pesquisa + data_coleta).
@@ -55,35 +138,20 @@ def run() -> pd.DataFrame:
     municipios_df = pd.read_csv(TABELA, dtype={"cod_ibge": str})
     ibges_pb      = set(municipios_df["cod_ibge"].tolist())
 
-    # ── Download nacional ─────────────────────────────────────────────────────
-    print(f"\n  Baixando CSV nacional do CKAN...")
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-    resp    = requests.get(URL_CAUC_BULK, headers=headers, verify=False, timeout=60)
-    resp.raise_for_status()
-
-    # ── Tratamento de encoding ────────────────────────────────────────────────
-    try:
-        texto = resp.content.decode("utf-8-sig")
-    except UnicodeDecodeError:
-        texto = resp.content.decode("iso-8859-1")
-
-    # Primeiras 3 linhas são metadados do Tesouro — skiprows=3
-    df_raw = pd.read_csv(io.StringIO(texto), sep=";", skiprows=3,
-                         dtype=str, na_filter=False)
-    print(f"  ✅ {len(df_raw)} municípios no Brasil")
-
-    # ── Extrai data da pesquisa do cabeçalho ──────────────────────────────────
-    linhas        = texto.split("\n")
-    data_pesquisa = linhas[0].strip().replace('"', '').replace('Data da Pesquisa: ', '')
+    # ── Download nacional (streaming para disco) ──────────────────────────────
+    # O corpo vai direto do socket para um .csv.gz; a leitura depois é feita
+    # em blocos e só as linhas PB são mantidas (~4% do arquivo nacional).
+    # O CAUC é publicado uma vez por dia: snapshot do dia já baixado é reutilizado.
+    snapshot = RAW_DIR / f"cauc_snapshot_{HOJE}.csv.gz"
+    if snapshot.exists():
+        print(f"\n  Reutilizando snapshot do dia: {snapshot.name}")
+    else:
+        print(f"\n  Baixando CSV nacional do CKAN...")
+        _baixar_snapshot(snapshot)
+
+    df_pb, data_pesquisa, n_brasil = _ler_pb(snapshot, ibges_pb)
     print(f"  Data da pesquisa: {data_pesquisa}")
-
-    # ── Filtragem para Paraíba ────────────────────────────────────────────────
-    col_ibge = next((c for c in df_raw.columns if "ibge" in c.lower()), None)
-    if not col_ibge:
-        raise ValueError(f"Coluna IBGE não encontrada. Colunas: {list(df_raw.columns)}")
-
-    df_raw[col_ibge] = df_raw[col_ibge].astype(str)
-    df_pb            = df_raw[df_raw[col_ibge].isin(ibges_pb)].copy()
+    print(f"  ✅ {n_brasil} municípios no Brasil")
 
     # Anexa metadados de coleta sem derivar nada dos dados fiscais
     df_pb["data_pesquisa"] = data_pesquisa
@@ -92,8 +160,12 @@ def run() -> pd.DataFrame:
     print(f"  Municípios PB encontrados: {len(df_pb)}")
 
     # ── Exportação raw ────────────────────────────────────────────────────────
-    df_pb.to_csv(RAW_DIR / f"cauc_raw_pb_{HOJE}.csv", index=False, encoding="utf-8-sig")
-    df_pb.to_csv(RAW_DIR / "cauc_raw_pb.csv",          index=False, encoding="utf-8-sig")
+    # Serializa uma vez; o latest é cópia byte a byte do datado. O Parquet vem
+    # por último para não ficar mais antigo que o CSV (ver utils.io.ler_tabela).
+    datado = RAW_DIR / f"cauc_raw_pb_{HOJE}.csv"
+    df_pb.to_csv(datado, index=False, encoding="utf-8-sig")
+    shutil.copyfile(datado, RAW_DIR / "cauc_raw_pb.csv")
+    df_pb.to_parquet(RAW_DIR / "cauc_raw_pb.parquet", compression="zstd", index=False)
     print(f"  Salvo em: raw/cauc/cauc_raw_pb.csv")
     print("=" * 70)
 
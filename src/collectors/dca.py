@@ -12,14 +12,26 @@ Atualizar ANOS_FULL para incluir 2025 a partir de maio/2026.
 Rodar individualmente:
     python src/collectors/dca.py                     # full (2020–2024)
     python src/collectors/dca.py --mode incremental  # apenas último ano disponível
+    python src/collectors/dca.py --refresh           # ignora o cache do último exercício
+
+Respostas não vazias ficam em raw/dca/dca_cache.sqlite, chaveadas por
+(cod, ano, anexo). Exercícios fechados não mudam, então reexecuções só
+vão à API para o que falta no cache.
 """
 
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import asyncio
+import json
+import sqlite3
+import zlib
 import httpx
 import pandas as pd
-import time
 import logging
-import sys
-from pathlib import Path
+from utils.io import ler_tabela, salvar_tabela
+from utils.limitador import LimitadorTaxa
 
 # ── Configuração ──────────────────────────────────────────────────────────────
 BASE_DIR  = Path(__file__).resolve().parent.parent.parent
@@ -39,8 +51,11 @@ ANOS_FULL        = [2020, 2021, 2022, 2023, 2024]
 ANOS_INCREMENTAL = [2024]   # último exercício consolidado disponível
 ANEXO_BP  = "DCA-Anexo I-AB"
 ANEXO_REC = "DCA-Anexo I-C"
-DELAY     = 0.4
+DELAY     = 0.4     # base do backoff entre tentativas
 MAX_RETRY = 3
+CONCORRENCIA = 10   # requisições simultâneas em voo
+TAXA_RPS     = 2.5  # ritmo tolerado pela API (≡ 1 requisição a cada DELAY)
+CACHE_DB  = RAW_DCA / "dca_cache.sqlite"
 
 CONTA_ATIVO_FIN      = "Ativo Financeiro"
 CONTA_PASSIVO_FIN    = "Passivo Financeiro"
@@ -48,15 +63,53 @@ CONTA_REC_TRIBUTARIA = "1.1.0.0.00.0.0 - Impostos, Taxas e Contribuições de Me
 CONTA_REC_CORRENTE   = "RECEITAS (EXCETO INTRA-ORÇAMENTÁRIAS) (I)"
 COLUNA_REALIZADO     = "Receitas Realizadas"
 
+# Nomes de conta já normalizados (lower/strip), como as chaves de indexar_itens
+_ATIVO_LC    = CONTA_ATIVO_FIN.lower().strip()
+_PASSIVO_LC  = CONTA_PASSIVO_FIN.lower().strip()
+_REC_TRIB_LC = CONTA_REC_TRIBUTARIA.lower().strip()
+_REC_CORR_LC = CONTA_REC_CORRENTE.lower().strip()
+
+
+# ── Cache local ───────────────────────────────────────────────────────────────
+
+def _cache_abrir() -> sqlite3.Connection:
+    con = sqlite3.connect(CACHE_DB)
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS cache ("
+        " cod TEXT, ano INT, anexo TEXT, fetched_at TEXT, payload BLOB,"
+        " PRIMARY KEY (cod, ano, anexo))"
+    )
+    return con
+
+
+def _cache_ler(con: sqlite3.Connection, cod: str, ano: int,
+               anexo: str) -> list[dict] | None:
+    row = con.execute(
+        "SELECT payload FROM cache WHERE cod = ? AND ano = ? AND anexo = ?",
+        (cod, ano, anexo),
+    ).fetchone()
+    return json.loads(zlib.decompress(row[0])) if row else None
+
+
+def _cache_gravar(con: sqlite3.Connection, cod: str, ano: int, anexo: str,
+                  items: list[dict]) -> None:
+    con.execute(
+        "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, datetime('now'), ?)",
+        (cod, ano, anexo, zlib.compress(json.dumps(items).encode())),
+    )
+
 
 # ── Funções de busca e extração ───────────────────────────────────────────────
 
-def fetch_dca(id_ente: str, ano: int, anexo: str,
-              client: httpx.Client) -> list[dict]:
+async def fetch_dca(id_ente: str, ano: int, anexo: str,
+                    client: httpx.AsyncClient,
+                    limitador: LimitadorTaxa | None = None) -> list[dict]:
     params = {"an_exercicio": ano, "no_anexo": anexo, "id_ente": id_ente}
     for tentativa in range(1, MAX_RETRY + 1):
+        if limitador is not None:
+            await limitador.adquirir()
         try:
-            r = client.get(API_BASE, params=params, timeout=30)
+            r = await client.get(API_BASE, params=params, timeout=30)
             r.raise_for_status()
             return r.json().get("items", [])
         except httpx.HTTPStatusError as e:
@@ -65,14 +118,14 @@ def fetch_dca(id_ente: str, ano: int, anexo: str,
             log.warning(f"  HTTP {e.response.status_code} | {id_ente} {ano} | tentativa {tentativa}")
         except Exception as e:
             log.warning(f"  Erro: {e} | {id_ente} {ano} | tentativa {tentativa}")
-        time.sleep(DELAY * tentativa)
+        await asyncio.sleep(DELAY * tentativa)
     return []
 
 
-def explorar_campos(id_ente: str, ano: int, anexo: str,
-                    client: httpx.Client) -> None:
+async def explorar_campos(id_ente: str, ano: int, anexo: str,
+                          client: httpx.AsyncClient) -> None:
     """Revalida mapeamento de campos após atualizações da API. Uso pontual."""
-    items = fetch_dca(id_ente, ano, anexo, client)
+    items = await fetch_dca(id_ente, ano, anexo, client)
     if not items:
         log.warning(f"Nenhum dado: {id_ente} {ano} {anexo}")
         return
@@ -86,97 +139,163 @@ def explorar_campos(id_ente: str, ano: int, anexo: str,
     log.info(f"{'='*60}\n")
 
 
-def extrair_bp(items: list[dict], nome_conta: str) -> float | None:
-    nome_lower = nome_conta.lower().strip()
+def indexar_itens(items: list[dict]) -> dict[tuple[str, str | None], dict]:
+    """
+    Indexa os itens de um anexo em uma única passada.
+    Chaves: (conta_normalizada, coluna) e (conta_normalizada, None) — esta
+    última aponta para a primeira ocorrência da conta em qualquer coluna.
+    """
+    idx: dict[tuple[str, str | None], dict] = {}
     for item in items:
-        if str(item.get("conta", "")).lower().strip() == nome_lower:
-            try:
-                return float(item.get("valor") or 0)
-            except (ValueError, TypeError):
-                return None
-    return None
+        conta  = str(item.get("conta",  "")).lower().strip()
+        coluna = str(item.get("coluna", "")).strip()
+        idx.setdefault((conta, coluna), item)
+        idx.setdefault((conta, None),   item)
+    return idx
 
 
-def extrair_receita(items: list[dict], nome_conta: str) -> float | None:
-    nome_lower = nome_conta.lower().strip()
+def extrair_valor(idx: dict[tuple[str, str | None], dict], conta_lc: str,
+                  coluna: str | None = None) -> float | None:
+    """
+    Valor da conta (nome já em lower/strip) no índice. Com `coluna`, tenta
+    primeiro (conta, coluna) e cai para a primeira ocorrência em qualquer coluna.
+    """
+    item = idx.get((conta_lc, coluna)) if coluna is not None else None
+    if item is None:
+        item = idx.get((conta_lc, None))
+    if item is None:
+        return None
+    try:
+        return float(item.get("valor") or 0)
+    except (ValueError, TypeError):
+        return None
 
-    for item in items:
-        conta_ok  = str(item.get("conta",  "")).lower().strip() == nome_lower
-        coluna_ok = str(item.get("coluna", "")).strip() == COLUNA_REALIZADO
-        if conta_ok and coluna_ok:
-            try:
-                return float(item.get("valor") or 0)
-            except (ValueError, TypeError):
-                return None
 
-    for item in items:
-        if str(item.get("conta", "")).lower().strip() == nome_lower:
-            try:
-                return float(item.get("valor") or 0)
-            except (ValueError, TypeError):
-                return None
+# ── Coleta principal ──────────────────────────────────────────────────────────
 
-    return None
+async def _buscar_todos(triplas: list[tuple[str, int, str]],
+                        refresh: bool = False) -> dict[tuple, list[dict]]:
+    """
+    Busca todas as triplas (cod, ano, anexo) em paralelo.
+    O semáforo limita as requisições em voo a CONCORRENCIA e o token bucket
+    mantém o ritmo global em TAXA_RPS, sem pausa fixa após cada resposta.
 
+    Triplas presentes no cache não vão à API. Com refresh=True, o último
+    exercício da lista (ainda sujeito a retificações) é rebuscado.
+    """
+    con         = _cache_abrir()
+    ano_recente = max(t[1] for t in triplas) if triplas else None
+    respostas: dict[tuple, list[dict]] = {}
+    faltantes = []
+    for t in triplas:
+        cached = None if (refresh and t[1] == ano_recente) else _cache_ler(con, *t)
+        if cached is None:
+            faltantes.append(t)
+        else:
+            respostas[t] = cached
+    log.info(f"  Cache DCA: {len(respostas)} em cache | {len(faltantes)} a buscar")
+
+    # BP e REC de um mesmo (cod, ano) são independentes: saem juntos, e o
+    # progresso é contado por município-ano como na coleta sequencial
+    pares: dict[tuple[str, int], list[str]] = {}
+    for cod, ano, anexo in faltantes:
+        pares.setdefault((cod, ano), []).append(anexo)
+
+    sem       = asyncio.Semaphore(CONCORRENCIA)
+    limitador = LimitadorTaxa(TAXA_RPS)
+    total     = len(pares)
+    feitos    = 0
+    limits    = httpx.Limits(max_connections=20, max_keepalive_connections=20)
+
+    async with httpx.AsyncClient(http2=True, limits=limits,
+                                 follow_redirects=True) as client:
+
+        async def _uma(cod: str, ano: int, anexo: str) -> list[dict]:
+            async with sem:
+                return await fetch_dca(cod, ano, anexo, client, limitador)
+
+        async def _par(cod: str, ano: int, anexos: list[str]) -> list[tuple]:
+            nonlocal feitos
+            lista = await asyncio.gather(*(_uma(cod, ano, a) for a in anexos))
+            feitos += 1
+            if feitos % 50 == 0 or feitos == total:
+                log.info(f"[{feitos:4d}/{total}] municípios-ano DCA concluídos")
+            return [((cod, ano, a), items) for a, items in zip(anexos, lista)]
+
+        grupos = await asyncio.gather(*(_par(cod, ano, anexos)
+                                        for (cod, ano), anexos in pares.items()))
+
+    # Respostas vazias não são gravadas: podem ser envio ainda pendente ou falha
+    with con:
+        for grupo in grupos:
+            for t, items in grupo:
+                respostas[t] = items
+                if items:
+                    _cache_gravar(con, *t, items)
+    con.close()
+    return respostas
+
+
+async def _explorar() -> None:
+    async with httpx.AsyncClient(http2=True, follow_redirects=True) as client:
+        await explorar_campos("2504009", 2024, ANEXO_BP,  client)
+        await explorar_campos("2504009", 2024, ANEXO_REC, client)
 
-# ── Coleta principal ──────────────────────────────────────────────────────────
 
 def coletar_dca(municipios: pd.DataFrame, anos: list[int],
-                explorar: bool = False) -> pd.DataFrame:
+                explorar: bool = False, refresh: bool = False) -> pd.DataFrame:
     """
     Coleta DCA para os municípios e anos informados.
     Retorna DataFrame com valores brutos — sem cálculo de indicadores.
+    refresh=True ignora o cache para o último ano de `anos`.
     """
-    registros    = []
-    n_registros  = len(municipios) * len(anos)
-    processados  = 0
-
-    with httpx.Client(follow_redirects=True) as client:
-
-        if explorar:
-            explorar_campos("2504009", 2024, ANEXO_BP,  client)
-            explorar_campos("2504009", 2024, ANEXO_REC, client)
-            return pd.DataFrame()
-
-        for _, mun in municipios.iterrows():
-            cod  = str(mun["cod_ibge"])
-            nome = mun["ente"]
-            pop  = mun.get("populacao", 0)
-
-            for ano in anos:
-                processados += 1
-                log.info(f"[{processados:4d}/{n_registros}] {nome} ({cod}) — {ano}")
-
-                items_bp = fetch_dca(cod, ano, ANEXO_BP, client)
-                time.sleep(DELAY)
-
-                ativo_fin = passivo_fin = None
-                if items_bp:
-                    ativo_fin   = extrair_bp(items_bp, CONTA_ATIVO_FIN)
-                    passivo_fin = extrair_bp(items_bp, CONTA_PASSIVO_FIN)
-
-                items_rec = fetch_dca(cod, ano, ANEXO_REC, client)
-                time.sleep(DELAY)
-
-                rec_trib = rec_corr = None
-                if items_rec:
-                    rec_trib = extrair_receita(items_rec, CONTA_REC_TRIBUTARIA)
-                    rec_corr = extrair_receita(items_rec, CONTA_REC_CORRENTE)
-
-                registros.append({
-                    "cod_ibge":           cod,
-                    "ente":               nome,
-                    "populacao":          pop,
-                    "ano":                ano,
-                    "ativo_financeiro":   ativo_fin,
-                    "passivo_financeiro": passivo_fin,
-                    "rec_tributaria":     rec_trib,
-                    "rec_corrente":       rec_corr,
-                    "bp_disponivel":      bool(items_bp),
-                    "rec_disponivel":     bool(items_rec),
-                })
-
-    return pd.DataFrame(registros)
+    if explorar:
+        asyncio.run(_explorar())
+        return pd.DataFrame()
+
+    cods    = municipios["cod_ibge"].astype(str).tolist()
+    triplas = [(cod, ano, anexo)
+               for cod in cods
+               for ano in anos
+               for anexo in (ANEXO_BP, ANEXO_REC)]
+    respostas = asyncio.run(_buscar_todos(triplas, refresh))
+
+    pops = municipios.get("populacao", pd.Series(0, index=municipios.index))
+
+    cols: dict[str, list] = {k: [] for k in (
+        "cod_ibge", "ente", "populacao", "ano",
+        "ativo_financeiro", "passivo_financeiro", "rec_tributaria", "rec_corrente",
+        "bp_disponivel", "rec_disponivel",
+    )}
+    for cod, nome, pop in zip(cods, municipios["ente"], pops):
+        for ano in anos:
+            items_bp  = respostas[(cod, ano, ANEXO_BP)]
+            items_rec = respostas[(cod, ano, ANEXO_REC)]
+
+            ativo_fin = passivo_fin = None
+            if items_bp:
+                bp_idx      = indexar_itens(items_bp)
+                ativo_fin   = extrair_valor(bp_idx, _ATIVO_LC)
+                passivo_fin = extrair_valor(bp_idx, _PASSIVO_LC)
+
+            rec_trib = rec_corr = None
+            if items_rec:
+                rec_idx  = indexar_itens(items_rec)
+                rec_trib = extrair_valor(rec_idx, _REC_TRIB_LC, COLUNA_REALIZADO)
+                rec_corr = extrair_valor(rec_idx, _REC_CORR_LC, COLUNA_REALIZADO)
+
+            cols["cod_ibge"].append(cod)
+            cols["ente"].append(nome)
+            cols["populacao"].append(pop)
+            cols["ano"].append(ano)
+            cols["ativo_financeiro"].append(ativo_fin)
+            cols["passivo_financeiro"].append(passivo_fin)
+            cols["rec_tributaria"].append(rec_trib)
+            cols["rec_corrente"].append(rec_corr)
+            cols["bp_disponivel"].append(bool(items_bp))
+            cols["rec_disponivel"].append(bool(items_rec))
+
+    return pd.DataFrame(cols)
 
 
 def _salvar_com_merge(df_novo: pd.DataFrame, caminho: Path) -> pd.DataFrame:
@@ -185,25 +304,27 @@ def _salvar_com_merge(df_novo: pd.DataFrame, caminho: Path) -> pd.DataFrame:
     concatena e desuplica por (cod_ibge, ano) — mantendo o mais recente.
     """
     if caminho.exists():
-        df_existente = pd.read_csv(caminho, dtype={"cod_ibge": str})
+        df_existente = ler_tabela(caminho, dtype={"cod_ibge": str})
         df_final = pd.concat([df_existente, df_novo], ignore_index=True)
         df_final = df_final.drop_duplicates(subset=["cod_ibge", "ano"], keep="last")
     else:
         df_final = df_novo
 
-    df_final.to_csv(caminho, index=False)
+    salvar_tabela(df_final, caminho)
     return df_final
 
 
-def run(mode: str = "full", municipios: pd.DataFrame | None = None) -> pd.DataFrame:
+def run(mode: str = "full", municipios: pd.DataFrame | None = None,
+        refresh: bool = False) -> pd.DataFrame:
     """
-    Executa a coleta DCA e salva raw/dca/dca_raw_pb.csv.
+    Executa a coleta DCA e salva raw/dca/dca_raw_pb.csv (+ .parquet).
 
     Parâmetros
     ----------
     mode       : "full"        — coleta ANOS_FULL completo
                  "incremental" — coleta ANOS_INCREMENTAL e faz merge no raw existente
     municipios : DataFrame de municípios PB. Se None, lê de processed/municipios_pb_tabela.csv.
+    refresh    : ignora o cache local para o último exercício coletado.
 
     Retorna o DataFrame bruto final (histórico completo após merge).
     """
@@ -224,13 +345,13 @@ def run(mode: str = "full", municipios: pd.DataFrame | None = None) -> pd.DataFr
     log.info(
         f"\nIniciando coleta DCA "
         f"({n_reg} registros | {n_reg * 2} requisições | "
-        f"~{n_reg * 2 * DELAY / 60:.0f} min)..."
+        f"~{n_reg * 2 / TAXA_RPS / 60:.0f} min sem cache)..."
     )
 
     # explorar_campos: descomentar para revalidar campos após atualização da API
     # coletar_dca(municipios, anos, explorar=True)
 
-    df_novo    = coletar_dca(municipios, anos)
+    df_novo    = coletar_dca(municipios, anos, refresh=refresh)
     caminho    = RAW_DCA / "dca_raw_pb.csv"
     df_final   = _salvar_com_merge(df_novo, caminho)
 
@@ -240,4 +361,4 @@ def run(mode: str = "full", municipios: pd.DataFrame | None = None) -> pd.DataFr
 
 if __name__ == "__main__":
     mode = "incremental" if "--mode" in sys.argv and "incremental" in sys.argv else "full"
-    run(mode=mode)
+    run(mode=mode, refresh="--refresh" in sys.argv)
@@ -7,9 +7,13 @@ Rodar individualmente:
     python src/collectors/municipios.py
 """
 
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
 import httpx
 import pandas as pd
-from pathlib import Path
+from utils.io import salvar_tabela
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 OUT      = BASE_DIR / "data" / "processed" / "municipios_pb_tabela.csv"
@@ -18,17 +22,20 @@ OUT.parent.mkdir(parents=True, exist_ok=True)
 
 def run() -> pd.DataFrame:
     """
-    Busca municípios PB no SICONFI e salva CSV de referência.
+    Busca municípios PB no SICONFI e salva CSV de referência (+ .parquet).
     Retorna DataFrame com colunas: cod_ibge, ente, cnpj, populacao, ...
     """
     print("Buscando municípios da PB no SICONFI...")
-    r    = httpx.get("https://apidatalake.tesouro.gov.br/ords/siconfi/tt/entes", timeout=30)
-    todos = r.json().get("items", [])
+    # Cliente com keep-alive, HTTP/2 e resposta comprimida (payload nacional de entes)
+    with httpx.Client(http2=True, timeout=30,
+                      headers={"Accept-Encoding": "gzip, deflate"}) as client:
+        r = client.get("https://apidatalake.tesouro.gov.br/ords/siconfi/tt/entes")
+        r.raise_for_status()
+    todos = pd.DataFrame(r.json().get("items", []))
 
-    pb = [e for e in todos if e.get("uf") == "PB" and e.get("esfera") == "M"]
-    df = pd.DataFrame(pb)
+    df = todos[(todos["uf"] == "PB") & (todos["esfera"] == "M")].reset_index(drop=True)
 
-    df.to_csv(OUT, index=False, encoding="utf-8")
+    salvar_tabela(df, OUT, encoding="utf-8")
     print(f"✅ {len(df)} municípios salvos em {OUT}")
     print(df[["cod_ibge", "ente", "cnpj", "populacao"]].head())
     return df
@@ -1,7 +1,8 @@
 """
 Coletor PNCP — Licitações PB (Lei 14.133/2021).
 Responsabilidade: coletar registros paginados por modalidade/mês e
-salvar o JSONL de checkpoint incremental.
+salvar o checkpoint incremental: um JSONL comprimido com zstd por bloco,
+em raw/pncp/blocos/<modalidade>_<AAAA-MM>.jsonl.zst.
 
 A consolidação JSONL → CSV, flattening de campos aninhados e seleção
 de colunas é feita por:
@@ -12,17 +13,29 @@ Rodar individualmente:
     python src/collectors/pncp.py --mode incremental  # apenas últimos 2 meses
 """
 
-import requests
-import json
-import time
 import sys
 from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import asyncio
+import httpx
+import logging
+import orjson
+import shutil
+import time
 from datetime import date, timedelta
 from calendar import monthrange
+from utils.io import salvar_linhas_zst
+from utils.limitador import LimitadorTaxa
+
+# ── Silencia loggers verbosos de libs externas ────────────────────────────────
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("httpcore").setLevel(logging.WARNING)
 
 # ── Diretórios ────────────────────────────────────────────────────────────────
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
-RAW_DIR  = BASE_DIR / "data" / "raw" / "pncp"
+RAW_DIR    = BASE_DIR / "data" / "raw" / "pncp"
+BLOCOS_DIR = RAW_DIR / "blocos"
 RAW_DIR.mkdir(parents=True, exist_ok=True)
 
 # ── Parâmetros da API ─────────────────────────────────────────────────────────
@@ -54,22 +67,25 @@ HEADERS = {
 }
 
 TAMANHO_PAGINA   = 50
-SLEEP_PAGINA     = 0.5
-SLEEP_MES        = 0.4
-SLEEP_MODALIDADE = 2.0
+TAXA_RPS         = 4   # teto proativo: abaixo do limite do PNCP, o ramo de 429 fica de reserva
 BACKOFF_429      = 60
 MAX_RETRIES      = 6
+CONCORRENCIA     = 8   # requisições em voo, somando todos os blocos
 
 
 # ── Utilitários ───────────────────────────────────────────────────────────────
 
-def gerar_meses(inicio: date, fim: date) -> list[tuple[date, date]]:
+def gerar_meses(inicio: date, fim: date) -> list[tuple[date, date, str, str]]:
+    """
+    Blocos mensais entre `inicio` e `fim`: (data_ini, data_fim, "AAAA-MM", "MM/AAAA").
+    Os rótulos saem prontos para o laço de coleta não formatar datas a cada bloco.
+    """
     meses = []
     ano, mes = inicio.year, inicio.month
     while date(ano, mes, 1) <= fim:
         ultimo_dia = monthrange(ano, mes)[1]
         fim_mes    = min(date(ano, mes, ultimo_dia), fim)
-        meses.append((date(ano, mes, 1), fim_mes))
+        meses.append((date(ano, mes, 1), fim_mes, f"{ano:04d}-{mes:02d}", f"{mes:02d}/{ano:04d}"))
         mes += 1
         if mes > 12:
             mes = 1
@@ -77,37 +93,87 @@ def gerar_meses(inicio: date, fim: date) -> list[tuple[date, date]]:
     return meses
 
 
-def fetch_com_backoff(params: dict) -> dict | None:
+def arquivo_bloco(chave: str) -> Path:
+    """Arquivo do checkpoint de um bloco (chave "<modalidade>_<AAAA-MM>")."""
+    return BLOCOS_DIR / f"{chave}.jsonl.zst"
+
+
+def migrar_jsonl_legado(legado: Path) -> None:
+    """
+    Reparte o checkpoint .jsonl único de versões anteriores em um arquivo
+    por bloco. Linhas inválidas (escrita interrompida) são descartadas,
+    como na leitura antiga.
+    """
+    if not legado.exists():
+        return
+    blocos: dict[str, list[bytes]] = {}
+    with open(legado, "rb") as fj:
+        for linha in fj:
+            try:
+                chave = orjson.loads(linha).get("_chave")
+            except orjson.JSONDecodeError:
+                continue
+            if chave:
+                blocos.setdefault(chave, []).append(linha.rstrip(b"\n") + b"\n")
+    BLOCOS_DIR.mkdir(exist_ok=True)
+    for chave, linhas in blocos.items():
+        salvar_linhas_zst(arquivo_bloco(chave), linhas)
+    legado.unlink()
+    print(f"  [INFO] {legado.name} migrado para {len(blocos)} arquivos em {BLOCOS_DIR.name}/.")
+
+
+async def fetch_com_backoff(
+    client: httpx.AsyncClient,
+    params: dict,
+    semaforo: asyncio.Semaphore,
+    limitador: LimitadorTaxa,
+    pausa_global: asyncio.Event,
+) -> dict | None:
     for t in range(1, MAX_RETRIES + 1):
+        await pausa_global.wait()
         try:
-            r = requests.get(BASE_URL, params=params, headers=HEADERS, timeout=30)
+            await limitador.adquirir()
+            async with semaforo:
+                r = await client.get(BASE_URL, params=params)
 
             if r.status_code == 200:
                 return r.json()
             if r.status_code == 204:
                 return {"data": [], "totalRegistros": 0, "totalPaginas": 0, "empty": True}
             if r.status_code == 429:
+                # Como no siconfi.py: o 429 pausa todas as requisições, não só
+                # esta — as demais esperam em pausa_global até o fim do backoff
                 espera = BACKOFF_429 * t
-                print(f"\n    [WARNING] 429 Rate Limit. Aguardando {espera}s (Tentativa {t}/{MAX_RETRIES})")
-                time.sleep(espera)
+                print(f"    [WARNING] 429 Rate Limit. Aguardando {espera}s (Tentativa {t}/{MAX_RETRIES})")
+                pausa_global.clear()
+                await asyncio.sleep(espera)
+                pausa_global.set()
                 continue
             if r.status_code in (500, 502, 503, 504):
-                time.sleep(15 * t)
+                await asyncio.sleep(15 * t)
                 continue
 
-            print(f"\n    [ERROR] HTTP {r.status_code}: {r.text[:120]}")
+            print(f"    [ERROR] HTTP {r.status_code}: {r.text[:120]}")
             return None
 
-        except requests.exceptions.Timeout:
-            time.sleep(10 * t)
-        except requests.exceptions.ConnectionError:
-            time.sleep(20 * t)
+        except httpx.TimeoutException:
+            await asyncio.sleep(10 * t)
+        except httpx.TransportError:
+            await asyncio.sleep(20 * t)
 
-    print(f"\n    [ERROR] Falha definitiva após {MAX_RETRIES} tentativas.")
+    print(f"    [ERROR] Falha definitiva após {MAX_RETRIES} tentativas.")
     return None
 
 
-def coletar_bloco(modalidade: int, data_ini: date, data_fim: date) -> tuple[list, bool]:
+async def coletar_bloco(
+    client: httpx.AsyncClient,
+    semaforo: asyncio.Semaphore,
+    limitador: LimitadorTaxa,
+    pausa_global: asyncio.Event,
+    modalidade: int,
+    data_ini: date,
+    data_fim: date,
+) -> tuple[list, bool]:
     params_base = {
         "dataInicial":                 data_ini.strftime("%Y%m%d"),
         "dataFinal":                   data_fim.strftime("%Y%m%d"),
@@ -117,7 +183,7 @@ def coletar_bloco(modalidade: int, data_ini: date, data_fim: date) -> tuple[list
         "pagina":                      1,
     }
 
-    resp = fetch_com_backoff(params_base)
+    resp = await fetch_com_backoff(client, params_base, semaforo, limitador, pausa_global)
     if resp is None:
         return [], False
     if resp.get("empty") or not resp.get("data"):
@@ -125,44 +191,107 @@ def coletar_bloco(modalidade: int, data_ini: date, data_fim: date) -> tuple[list
 
     registros  = list(resp["data"])
     total_pags = resp.get("totalPaginas", 1)
-    total_regs = resp.get("totalRegistros", 0)
 
-    if total_regs > 0:
-        print(f" {total_regs} regs / {total_pags} págs", end="", flush=True)
-
-    for pag in range(2, total_pags + 1):
-        time.sleep(SLEEP_PAGINA)
-        resp_pag = fetch_com_backoff({**params_base, "pagina": pag})
-        if resp_pag and resp_pag.get("data"):
-            registros.extend(resp_pag["data"])
+    # Páginas 2..N são independentes: saem juntas, limitadas pelo semáforo e
+    # pelo token bucket globais. gather() preserva a ordem das páginas.
+    # Uma página perdida invalida o bloco: ele não entra no checkpoint e é
+    # coletado de novo na próxima execução.
+    if total_pags > 1:
+        paginas = await asyncio.gather(*(
+            fetch_com_backoff(client, {**params_base, "pagina": pag}, semaforo, limitador,
+                              pausa_global)
+            for pag in range(2, total_pags + 1)
+        ))
+        if any(resp_pag is None for resp_pag in paginas):
+            return [], False
+        for resp_pag in paginas:
+            if resp_pag.get("data"):
+                registros.extend(resp_pag["data"])
 
     return registros, True
 
 
+async def _rotular(rotulo, coro) -> tuple:
+    """Associa o resultado de um bloco ao seu rótulo (metadados de checkpoint)."""
+    registros, sucesso = await coro
+    return rotulo, registros, sucesso
+
+
+async def coletar_blocos(pendentes: list[tuple[dict, date, date, str]]) -> int:
+    """
+    Coleta os blocos pendentes em paralelo e grava cada um no checkpoint assim
+    que termina. Retorna o número de registros novos.
+    """
+    semaforo     = asyncio.Semaphore(CONCORRENCIA)
+    # Um único balde para todas as requisições da coleta (1ª página e demais,
+    # de todos os blocos); criado aqui por depender do event loop corrente
+    limitador    = LimitadorTaxa(TAXA_RPS)
+    pausa_global = asyncio.Event()
+    pausa_global.set()
+    limits       = httpx.Limits(max_keepalive_connections=CONCORRENCIA, max_connections=CONCORRENCIA)
+    total        = 0
+
+    async with httpx.AsyncClient(http2=True, headers=HEADERS, timeout=30.0, limits=limits) as client:
+        tarefas = [
+            _rotular((meta, mes_ano), coletar_bloco(client, semaforo, limitador, pausa_global,
+                                                    meta["_modalidade"], data_ini, data_fim))
+            for meta, data_ini, data_fim, mes_ano in pendentes
+        ]
+
+        # Só este laço escreve no checkpoint (chamadas síncronas entre awaits),
+        # então a gravação dispensa lock.
+        for proxima in asyncio.as_completed(tarefas):
+            (meta, mes_ano), registros, sucesso = await proxima
+            rotulo = f"  [{meta['_modalidade']:02d}] {mes_ano} ->"
+
+            if not sucesso:
+                print(f"{rotulo} [ERROR] Falha de comunicação. Bloco pendente.")
+                continue
+
+            # Um arquivo zstd por bloco, renomeado só depois de completo: bloco
+            # interrompido no meio da escrita não deixa arquivo e volta a ser pendente
+            if registros:
+                salvar_linhas_zst(arquivo_bloco(meta["_chave"]),
+                                  (orjson.dumps(rec | meta) + b"\n" for rec in registros))
+                total += len(registros)
+                print(f"{rotulo} ✓ (+{len(registros)})")
+            else:
+                salvar_linhas_zst(arquivo_bloco(meta["_chave"]),
+                                  [orjson.dumps({**meta, "_sem_dados": True}) + b"\n"])
+                print(f"{rotulo} ∅")
+
+    return total
+
+
 # ── Entry point ───────────────────────────────────────────────────────────────
 
 def run(mode: str = "full") -> None:
     """
-    Executa a coleta PNCP e salva raw/pncp/pncp_parcial.jsonl.
+    Executa a coleta PNCP e salva um raw/pncp/blocos/*.jsonl.zst por bloco.
 
     Parâmetros
     ----------
     mode : "full"        — coleta desde DATA_INICIO_FULL (2023-01-01).
-                           Se o JSONL já existir, apaga e reinicia do zero.
+                           Se o checkpoint já existir, apaga e reinicia do zero.
            "incremental" — coleta apenas os últimos JANELA_INCREMENTAL_DIAS dias.
-                           Usa o checkpoint JSONL existente (pula blocos já feitos).
+                           Usa o checkpoint existente (pula blocos já feitos).
     """
-    hoje        = date.today()
-    snap_jsonl  = RAW_DIR / "pncp_parcial.jsonl"
+    hoje   = date.today()
+    legado = RAW_DIR / "pncp_parcial.jsonl"
 
     if mode == "full":
         data_inicio = DATA_INICIO_FULL
-        # Full apaga o JSONL existente e recomeça do zero
-        if snap_jsonl.exists():
-            snap_jsonl.unlink()
-            print("  [INFO] JSONL anterior removido — coleta full reiniciada.")
+        # Full apaga o checkpoint existente e recomeça do zero
+        if BLOCOS_DIR.exists():
+            shutil.rmtree(BLOCOS_DIR)
+            print(f"  [INFO] {BLOCOS_DIR.name}/ removido — coleta full reiniciada.")
+        if legado.exists():
+            legado.unlink()
+            print(f"  [INFO] {legado.name} removido — coleta full reiniciada.")
     else:
         data_inicio = hoje - timedelta(days=JANELA_INCREMENTAL_DIAS)
+        migrar_jsonl_legado(legado)
+    BLOCOS_DIR.mkdir(exist_ok=True)
 
     t0    = time.time()
     meses = gerar_meses(data_inicio, hoje)
@@ -175,66 +304,31 @@ def run(mode: str = "full") -> None:
     print("=" * 65)
 
     # ── Checkpoint: blocos já coletados ──────────────────────────────────────
-    chaves_feitas: set[str] = set()
-    if snap_jsonl.exists():
-        with open(snap_jsonl, "r", encoding="utf-8") as fj:
-            for linha in fj:
-                try:
-                    obj = json.loads(linha)
-                    if obj.get("_chave"):
-                        chaves_feitas.add(obj["_chave"])
-                except Exception:
-                    pass
-        if chaves_feitas:
-            print(f"\n  [INFO] {len(chaves_feitas)} blocos já no JSONL — serão ignorados.")
-
-    total = 0
-
-    with open(snap_jsonl, "a", encoding="utf-8") as fj:
-        for cod_mod, nome_mod in MODALIDADES.items():
-            print(f"\n▶ [{cod_mod:02d}] {nome_mod}")
-
-            for data_ini, data_fim_bloco in meses:
-                chave = f"{cod_mod}_{data_ini.strftime('%Y-%m')}"
-
-                if chave in chaves_feitas:
-                    continue
-
-                print(f"  {data_ini.strftime('%m/%Y')} ->", end=" ", flush=True)
-
-                meta = {
-                    "_chave":           chave,
-                    "_modalidade":      cod_mod,
-                    "_modalidade_nome": nome_mod,
-                    "_mes":             data_ini.strftime("%Y-%m"),
-                }
-
-                registros, sucesso = coletar_bloco(cod_mod, data_ini, data_fim_bloco)
-
-                if not sucesso:
-                    print("[ERROR] Falha de comunicação. Bloco pendente.")
-                    time.sleep(5)
-                    continue
-
-                if registros:
-                    for rec in registros:
-                        rec.update(meta)
-                        fj.write(json.dumps(rec, ensure_ascii=False) + "\n")
-                    total += len(registros)
-                    print(f"✓ (+{len(registros)})")
-                else:
-                    fj.write(json.dumps({**meta, "_sem_dados": True}) + "\n")
-                    print("∅")
-
-                fj.flush()
-                time.sleep(SLEEP_MES)
-
-            time.sleep(SLEEP_MODALIDADE)
+    # O nome do arquivo é a chave do bloco: nada precisa ser descomprimido.
+    # Restos .part de uma gravação interrompida não contam e são sobrescritos.
+    chaves_feitas = {p.name.removesuffix(".jsonl.zst") for p in BLOCOS_DIR.glob("*.jsonl.zst")}
+    if chaves_feitas:
+        print(f"\n  [INFO] {len(chaves_feitas)} blocos já no checkpoint — serão ignorados.")
+
+    pendentes = [
+        ({
+            "_chave":           f"{cod_mod}_{ano_mes}",
+            "_modalidade":      cod_mod,
+            "_modalidade_nome": nome_mod,
+            "_mes":             ano_mes,
+        }, data_ini, data_fim_bloco, mes_ano)
+        for cod_mod, nome_mod in MODALIDADES.items()
+        for data_ini, data_fim_bloco, ano_mes, mes_ano in meses
+        if f"{cod_mod}_{ano_mes}" not in chaves_feitas
+    ]
+    print(f"\n  [INFO] {len(pendentes)} blocos a coletar.\n")
+
+    total = asyncio.run(coletar_blocos(pendentes))
 
     elapsed = time.time() - t0
     print(f"\n[SUCCESS] Coleta concluída em {elapsed / 60:.1f} min")
     print(f"   Registros novos : {total:,}")
-    print(f"   JSONL em        : {snap_jsonl.name}")
+    print(f"   Checkpoint em   : {BLOCOS_DIR.name}/")
     print("   Próximo passo   : python src/processors/pncp_processor.py")
     print("=" * 65)
 
@@ -4,8 +4,14 @@ Gerencia requisições concorrentes aos endpoints RREO e RGF, implementando
 semáforos de controle de tráfego e resiliência contra rate limits (429).
 
 Output (bruto):
-    raw/siconfi/siconfi_rreo_pb.csv
-    raw/siconfi/siconfi_rgf_pb.csv
+    raw/siconfi/siconfi_rreo_pb.csv   (+ .parquet/zstd, lido pelo processor)
+    raw/siconfi/siconfi_rgf_pb.csv    (+ .parquet/zstd, lido pelo processor)
+
+Durante a coleta, cada tarefa concluída é gravada em
+raw/siconfi/siconfi_{rreo,rgf}_pb.jsonl (uma linha por registro); o CSV é
+montado a partir desses arquivos no fim. Tarefas concluídas sem erro ficam
+registradas em raw/siconfi/siconfi_done.jsonl: se a coleta cair, a próxima
+execução pula o que já foi feito. Os três arquivos são removidos após o merge.
 
 O processamento analítico dos arquivos brutos é feito por:
     src/processors/siconfi_processor.py
@@ -15,14 +21,27 @@ Rodar individualmente:
     python src/collectors/siconfi.py --mode incremental  # apenas anos recentes
 """
 
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
 import asyncio
+import hashlib
 import httpx
+import io
 import logging
-import pandas as pd
-import sys
+import orjson
+import os
+import pyarrow as pa
+import pyarrow.compute as pc
+import random
 import time
 from datetime import date
-from pathlib import Path
+from pyarrow import csv as pacsv
+from pyarrow import json as pajson
+from pyarrow import parquet as pq
+from utils.io import origem_tabela
+from utils.limitador import ControleAdmissao, LimitadorTaxa
 
 # ── Silencia loggers verbosos de libs externas ────────────────────────────────
 logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -38,9 +57,27 @@ RAW_DIR.mkdir(parents=True, exist_ok=True)
 LEGACY_RREO = BASE_DIR / "data" / "processed" / "siconfi_rreo_pb.csv"
 LEGACY_RGF  = BASE_DIR / "data" / "processed" / "siconfi_rgf_pb.csv"
 
+# Área de trabalho da coleta: resultados por tarefa, gravados à medida que chegam
+STAGING_RREO = RAW_DIR / "siconfi_rreo_pb.jsonl"
+STAGING_RGF  = RAW_DIR / "siconfi_rgf_pb.jsonl"
+CHECKPOINT   = RAW_DIR / "siconfi_done.jsonl"
+
+# Lista de municípios PB do IBGE, reaproveitada enquanto tiver menos de 30 dias
+CACHE_IBGE          = BASE_DIR / "data" / "raw" / "ibge_pb_municipios.json"
+VALIDADE_CACHE_IBGE = 30 * 86400   # segundos
+
 # ── API e concorrência ────────────────────────────────────────────────────────
 BASE_URL_SICONFI = "https://apidatalake.tesouro.gov.br/ords/siconfi/tt"
-MAX_CONCORRENCIA = 10
+MAX_CONCORRENCIA = 10    # requisições HTTP em voo (não tarefas)
+TAXA_RPS         = 8     # ritmo contínuo abaixo do limiar de 429 da API
+TAMANHO_PAGINA   = 5000
+PREFETCH_PAGINAS = 3    # offsets buscados juntos quando o anexo tem mais de uma página
+
+# Retentativas: backoff exponencial com teto e jitter (ou Retry-After, se maior)
+TENTATIVAS     = 5
+BACKOFF_BASE   = 0.5    # s
+BACKOFF_MAX    = 32.0   # s
+BACKOFF_JITTER = 0.25   # s
 
 ANOS_FULL        = [2020, 2021, 2022, 2023, 2024, 2025, 2026]
 ANOS_INCREMENTAL = [date.today().year - 1, date.today().year]
@@ -51,6 +88,20 @@ ANEXOS_RGF  = ["RGF-Anexo 05"]
 CHAVE_RREO = ["cod_ibge", "exercicio", "periodo", "anexo", "cod_conta", "coluna"]
 CHAVE_RGF  = ["cod_ibge", "exercicio", "periodo", "anexo", "periodicidade", "cod_conta", "coluna"]
 
+# Tipos fixos das colunas que o processor usa; campos extras da API (rotulo,
+# instituicao, uf…) continuam entrando, com tipo inferido pelo leitor.
+SCHEMA_RREO = pa.schema([
+    ("cod_ibge",  pa.int64()),
+    ("exercicio", pa.int32()),
+    ("periodo",   pa.int32()),
+    ("anexo",     pa.string()),
+    ("cod_conta", pa.string()),
+    ("coluna",    pa.string()),
+    ("conta",     pa.string()),
+    ("valor",     pa.float64()),
+])
+SCHEMA_RGF = SCHEMA_RREO.insert(3, pa.field("periodicidade", pa.string()))
+
 
 # ── Progress display ──────────────────────────────────────────────────────────
 
@@ -105,13 +156,19 @@ class Progresso:
 
 # ── HTTP ──────────────────────────────────────────────────────────────────────
 
-def obter_municipios_pb() -> list:
+async def obter_municipios_pb(client: httpx.AsyncClient) -> list:
+    if CACHE_IBGE.exists() and time.time() - CACHE_IBGE.stat().st_mtime < VALIDADE_CACHE_IBGE:
+        municipios = orjson.loads(CACHE_IBGE.read_bytes())
+        print(f"  Municípios da PB: {len(municipios)} (cache {CACHE_IBGE.name}).")
+        return municipios
+
     url_ibge = "https://servicodados.ibge.gov.br/api/v1/localidades/estados/PB/municipios"
     print("  Buscando municípios da PB no IBGE...", end=" ")
     try:
-        resposta = httpx.get(url_ibge, timeout=15)
+        resposta = await client.get(url_ibge, timeout=15)
         resposta.raise_for_status()
         municipios = [str(mun["id"]) for mun in resposta.json()]
+        CACHE_IBGE.write_bytes(orjson.dumps(municipios))
         print(f"{len(municipios)} encontrados.")
         return municipios
     except Exception as e:
@@ -119,21 +176,39 @@ def obter_municipios_pb() -> list:
         return ["2504100", "2507507"]
 
 
+def _espera(tentativa: int, resposta: httpx.Response | None = None) -> float:
+    """Segundos até a próxima tentativa; Retry-After em segundos prevalece se for maior."""
+    retry_after = 0.0
+    if resposta is not None:
+        try:
+            retry_after = float(resposta.headers.get("Retry-After") or 0)
+        except ValueError:
+            pass   # Retry-After em formato de data HTTP: ignorado
+    backoff = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** tentativa)
+    return max(retry_after, backoff) + random.random() * BACKOFF_JITTER
+
+
 async def fetch_com_retry(
     client: httpx.AsyncClient,
     url: str,
     params: dict,
     pausa_global: asyncio.Event,
-    tentativas: int = 3,
+    controle: ControleAdmissao,
+    limitador: LimitadorTaxa,
+    tentativas: int = TENTATIVAS,
 ) -> dict | None:
     for tentativa in range(tentativas):
         await pausa_global.wait()
         try:
-            resposta = await client.get(url, params=params)
+            # Vaga e ficha por chamada (inclusive retentativas), não por tarefa;
+            # a vaga é devolvida antes de qualquer espera de backoff
+            async with controle.vaga():
+                await limitador.adquirir()
+                resposta = await client.get(url, params=params)
 
             if resposta.status_code == 429:
                 pausa_global.clear()
-                await asyncio.sleep(2 ** tentativa)
+                await asyncio.sleep(_espera(tentativa, resposta))
                 pausa_global.set()
                 continue
 
@@ -141,12 +216,13 @@ async def fetch_com_retry(
             return resposta.json()
 
         except httpx.HTTPStatusError as e:
-            if e.response.status_code in (400, 404):
+            # Demais 4xx não mudam com nova tentativa; 5xx sim
+            if e.response.status_code < 500:
                 return None
-            await asyncio.sleep(2 ** tentativa)
+            await asyncio.sleep(_espera(tentativa, e.response))
 
         except httpx.RequestError:
-            await asyncio.sleep(2 ** tentativa)
+            await asyncio.sleep(_espera(tentativa))
 
     return None
 
@@ -158,12 +234,14 @@ async def extrair_assincrono(
     periodo: int,
     id_ente: str,
     anexo: str,
-    semaforo: asyncio.Semaphore,
+    controle: ControleAdmissao,
     pausa_global: asyncio.Event,
+    limitador: LimitadorTaxa,
     progresso: Progresso,
     poder: str = None,
     periodicidade: str = None,
-) -> list:
+) -> tuple[list, bool]:
+    """Todas as páginas de um anexo. Retorna (registros, houve_erro)."""
     url    = f"{BASE_URL_SICONFI}/{endpoint}"
     params = {
         "an_exercicio":          ano,
@@ -172,7 +250,7 @@ async def extrair_assincrono(
         "no_anexo":              anexo,
         "id_ente":               id_ente,
         "offset":                0,
-        "limit":                 5000,
+        "limit":                 TAMANHO_PAGINA,
     }
     if poder and endpoint == "rgf":
         params["co_poder"] = poder
@@ -183,168 +261,392 @@ async def extrair_assincrono(
     offset          = 0
     erro            = False
 
-    async with semaforo:
-        while True:
-            params["offset"] = offset
-            dados = await fetch_com_retry(client, url, params, pausa_global)
-
+    # A 1ª página sai sozinha (a maioria dos anexos cabe nela). Se houver
+    # mais, os próximos PREFETCH_PAGINAS offsets são pedidos em paralelo e
+    # processados em ordem até o primeiro hasMore=False; o que vier depois
+    # dele é descartado.
+    lote_tam = 1
+    fim      = False
+    while not fim:
+        lote = await asyncio.gather(*(
+            fetch_com_retry(client, url,
+                            {**params, "offset": offset + i * TAMANHO_PAGINA},
+                            pausa_global, controle, limitador)
+            for i in range(lote_tam)
+        ))
+
+        for dados in lote:
             if dados is None:
                 erro = True
+                fim  = True
                 break
 
             if "items" not in dados:
+                fim = True
                 break
 
             todos_registros.extend(dados.get("items", []))
 
             if not dados.get("hasMore", False):
+                fim = True
                 break
 
-            offset += 5000
+        offset  += lote_tam * TAMANHO_PAGINA
+        lote_tam = PREFETCH_PAGINAS
 
     await progresso.tick(
         n_registros=len(todos_registros),
         erro=erro,
         vazia=(len(todos_registros) == 0 and not erro),
     )
-    return todos_registros
+    return todos_registros, erro
 
 
 # ── Persistência ──────────────────────────────────────────────────────────────
 
-def _carregar_base(caminho_novo: Path, caminho_legado: Path) -> pd.DataFrame | None:
+# Nulos como texto: "nan"/"None" vêm de bases gravadas pelo merge antigo em
+# pandas (astype(str)); vazio é o nulo do escritor CSV do Arrow
+NULOS_TEXTO      = ["", "nan", "NaN", "None", "null"]
+_OPCOES_CSV_BASE = pacsv.ConvertOptions(null_values=NULOS_TEXTO, strings_can_be_null=True)
+
+
+def _carregar_base(caminho_novo: Path, caminho_legado: Path) -> pa.Table | None:
     """
-    Carrega o DataFrame base para merge incremental.
+    Carrega a tabela base para merge incremental.
 
     Prioridade:
       1. caminho_novo  (raw/siconfi/) — arquivo já na estrutura nova
+                                        (o Parquet ao lado, se estiver em dia)
       2. caminho_legado (processed/)  — arquivo da estrutura anterior à refatoração
       3. None                          — primeira coleta, sem histórico
 
     Se encontrar apenas o legado, avisa e usa como base (sem mover o arquivo —
     o usuário pode apagar o legado após confirmar que o novo está correto).
     """
-    if caminho_novo.exists():
-        return pd.read_csv(caminho_novo, dtype=str)
+    if caminho_novo.exists() or caminho_novo.with_suffix(".parquet").exists():
+        origem = origem_tabela(caminho_novo)
+        if origem.suffix == ".parquet":
+            return pq.read_table(origem)
+        return pacsv.read_csv(origem, convert_options=_OPCOES_CSV_BASE)
 
     if caminho_legado.exists():
         print(f"\n  ⚠️  Arquivo novo não encontrado. Usando base legada: {caminho_legado.name}")
         print(f"      (após confirmar integridade, você pode remover {caminho_legado})")
-        return pd.read_csv(caminho_legado, dtype=str)
+        return pacsv.read_csv(caminho_legado, convert_options=_OPCOES_CSV_BASE)
 
     return None
 
 
+def _alinhar(base: pa.Table, novo: pa.Table) -> tuple[pa.Table, pa.Table]:
+    """
+    Converte as colunas da base para os tipos da tabela nova (schema fixo +
+    extras inferidos no staging). Texto com nulo textual vira nulo antes do
+    cast. Coluna que não converte fica como texto dos dois lados.
+    """
+    for nome in set(base.column_names) & set(novo.column_names):
+        col, alvo = base.column(nome), novo.schema.field(nome).type
+        if col.type == alvo:
+            continue
+        if pa.types.is_string(col.type) or pa.types.is_large_string(col.type):
+            col = pc.if_else(pc.is_in(col, value_set=pa.array(NULOS_TEXTO)),
+                             pa.scalar(None, col.type), col)
+        try:
+            col = col.cast(alvo)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            col = col.cast(pa.string())
+            idx = novo.column_names.index(nome)
+            novo = novo.set_column(idx, nome, novo.column(nome).cast(pa.string()))
+        base = base.set_column(base.column_names.index(nome), nome, col)
+    return base, novo
+
+
 def _salvar_com_merge(
-    df_novo: pd.DataFrame,
+    novo: pa.Table,
     caminho: Path,
     chave: list[str],
     caminho_legado: Path,
 ) -> None:
     """
-    Salva df_novo. Se existir base histórica (novo ou legado),
+    Salva a tabela nova. Se existir base histórica (novo ou legado),
     concatena e desuplica pela chave natural — mantendo o registro mais recente.
+    O merge é feito no Arrow, com a base convertida para os tipos da tabela
+    nova: o arquivo gravado tem o mesmo schema com ou sem histórico.
     """
-    df_existente = _carregar_base(caminho, caminho_legado)
+    base = _carregar_base(caminho, caminho_legado)
 
-    if df_existente is not None:
-        df_final     = pd.concat([df_existente, df_novo.astype(str)], ignore_index=True)
-        chave_valida = [c for c in chave if c in df_final.columns]
+    if base is not None:
+        base, novo = _alinhar(base, novo)
+        tabela       = pa.concat_tables([base, novo], promote_options="default")
+        chave_valida = [c for c in chave if c in tabela.column_names]
         if chave_valida:
-            antes    = len(df_final)
-            df_final = df_final.drop_duplicates(subset=chave_valida, keep="last")
-            duplic   = antes - len(df_final)
+            # Último registro de cada chave: maior posição no concat (novo vem depois)
+            ultimos = (tabela.select(chave_valida)
+                       .append_column("_pos", pa.array(range(tabela.num_rows), pa.int64()))
+                       .group_by(chave_valida, use_threads=False)
+                       .aggregate([("_pos", "max")])
+                       .column("_pos_max"))
+            duplic  = tabela.num_rows - len(ultimos)
+            tabela  = tabela.take(ultimos)
             if duplic:
                 print(f"\n  🔁 {duplic:,} duplicatas removidas no merge ({caminho.name})")
     else:
-        df_final = df_novo
+        tabela = novo
+
+    # Ordem canônica pela chave: a ordem de chegada das tarefas varia entre
+    # execuções e não pode, sozinha, mudar o arquivo (nem o hash abaixo)
+    tabela = tabela.sort_by([(c, "ascending") for c in chave if c in tabela.column_names])
+    # Anos do resumo: unique no Arrow e cast só dos poucos valores distintos
+    anos   = (sorted(tabela.column("exercicio").unique().cast(pa.int32()).to_pylist())
+              if "exercicio" in tabela.column_names else [])
+
+    # Coleta que não trouxe nada novo não reescreve centenas de MB: o hash do
+    # CSV que seria gravado é comparado ao da gravação anterior
+    caminho_pq   = caminho.with_suffix(".parquet")
+    caminho_hash = caminho.with_suffix(".hash")
+    digest       = _hash_csv(tabela)
+    if (caminho.exists() and caminho_pq.exists() and caminho_hash.exists()
+            and caminho_hash.read_text().strip() == digest):
+        print(f"  ⏭️  {caminho.name}: sem mudanças ({tabela.num_rows:,} linhas) — gravação pulada")
+        return
+
+    # Escritores nativos do Arrow: CSV (histórico do merge / inspeção) e o
+    # Parquet/zstd ao lado, que é o que o siconfi_processor lê. Cada arquivo
+    # é gravado num .tmp e trocado com os.replace; o Parquet sai depois do
+    # CSV para nunca ficar mais antigo que ele, e o hash por último.
+    for destino, gravar in (
+        (caminho,      lambda tmp: pacsv.write_csv(tabela, str(tmp))),
+        (caminho_pq,   lambda tmp: pq.write_table(tabela, tmp, compression="zstd")),
+        (caminho_hash, lambda tmp: tmp.write_text(digest)),
+    ):
+        tmp = destino.with_name(destino.name + ".tmp")
+        gravar(tmp)
+        os.replace(tmp, destino)
+    print(f"  💾 {caminho.name}: {tabela.num_rows:,} linhas | anos: {anos}")
+
+
+class _SaidaHash(io.RawIOBase):
+    """Destino de escrita que só alimenta um hash (nada vai para o disco)."""
+
+    def __init__(self):
+        super().__init__()
+        self.hash = hashlib.blake2b(digest_size=16)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, dados) -> int:
+        self.hash.update(dados)
+        return len(dados)
+
+
+def _hash_csv(tabela: pa.Table) -> str:
+    """BLAKE2b do CSV que pacsv.write_csv gravaria para `tabela`, em streaming."""
+    saida = _SaidaHash()
+    with pa.PythonFile(saida, mode="w") as destino:
+        pacsv.write_csv(tabela, destino)
+    return saida.hash.hexdigest()
+
+
+def _ler_staging(caminho: Path, schema: pa.Schema) -> pa.Table:
+    """
+    Tabela Arrow com os registros gravados no JSONL de trabalho, lida pelo
+    leitor JSON nativo do Arrow: colunas montadas em C++, com os tipos de
+    `schema` fixados de antemão. Chave ausente num registro vira nulo.
+    """
+    if not caminho.exists() or caminho.stat().st_size == 0:
+        return schema.empty_table()
+    tabela = pajson.read_json(
+        caminho,
+        parse_options=pajson.ParseOptions(
+            explicit_schema=schema,
+            unexpected_field_behavior="infer",
+        ),
+    )
+    # Campos extras entram na ordem em que apareceram, que depende da ordem
+    # de chegada das tarefas; fixa-se a ordem alfabética depois do schema
+    extras = sorted(set(tabela.column_names) - set(schema.names))
+    return tabela.select(schema.names + extras)
+
 
-    df_final.to_csv(caminho, index=False, encoding="utf-8")
-    anos = sorted(df_final["exercicio"].unique()) if "exercicio" in df_final.columns else []
-    print(f"  💾 {caminho.name}: {len(df_final):,} linhas | anos: {anos}")
+def _carregar_checkpoint() -> set[tuple]:
+    """Chaves (tipo, ano, id_ente, periodo, anexo[, periodicidade]) já concluídas."""
+    if not CHECKPOINT.exists():
+        return set()
+    with open(CHECKPOINT, "rb") as f:
+        return {tuple(orjson.loads(linha)["k"]) for linha in f if linha.strip()}
 
 
 # ── Orquestração ──────────────────────────────────────────────────────────────
 
+async def _produtor(fila: asyncio.Queue, malha: list[tuple], n_trabalhadores: int) -> None:
+    """Alimenta a fila com os parâmetros da malha e, ao fim, um None por trabalhador."""
+    for params in malha:
+        await fila.put(params)
+    for _ in range(n_trabalhadores):
+        await fila.put(None)
+
+
+async def _trabalhador(
+    fila: asyncio.Queue,
+    resultados: asyncio.Queue,
+    client: httpx.AsyncClient,
+    controle: ControleAdmissao,
+    pausa_global: asyncio.Event,
+    limitador: LimitadorTaxa,
+    progresso: dict[str, Progresso],
+) -> None:
+    """
+    Consome parâmetros da fila até receber None e publica
+    (destino, chave, itens, erro) em `resultados`, um por anexo. Ao sair,
+    publica None — também quando sai por exceção, que fica na tarefa para o
+    orquestrador relançar.
+
+    Os anexos de um mesmo (ente, ano, período) vêm juntos e saem em
+    sequência: o primeiro serve de sonda. Se ele voltar vazio sem erro, o
+    ente não entregou o demonstrativo no período e os demais anexos são
+    registrados como vazios sem ir à API.
+    """
+    try:
+        while (params := await fila.get()) is not None:
+            destino, ano, periodo, id_ente, anexos, poder, periodicidade = params
+            sem_entrega = False
+            for i, anexo in enumerate(anexos):
+                if sem_entrega:
+                    itens, erro = [], False
+                    await progresso[destino].tick(vazia=True)
+                else:
+                    itens, erro = await extrair_assincrono(
+                        client, destino, ano, periodo, id_ente, anexo,
+                        controle, pausa_global, limitador, progresso[destino],
+                        poder=poder, periodicidade=periodicidade,
+                    )
+                    sem_entrega = i == 0 and not itens and not erro
+                chave = [ano, id_ente, periodo, anexo]
+                if destino == "rgf":
+                    chave.append(periodicidade)
+                await resultados.put((destino, chave, itens, erro))
+    finally:
+        await resultados.put(None)
+
+
 async def orquestrar_coleta(anos: list[int]) -> None:
-    semaforo     = asyncio.Semaphore(MAX_CONCORRENCIA)
+    controle     = ControleAdmissao(MAX_CONCORRENCIA)
+    limitador    = LimitadorTaxa(TAXA_RPS)
     pausa_global = asyncio.Event()
     pausa_global.set()
 
-    inicio        = time.time()
-    municipios_pb = obter_municipios_pb()
-    limits        = httpx.Limits(max_keepalive_connections=10, max_connections=15)
-
-    tarefas_rreo_params = []
-    tarefas_rgf_params  = []
-
-    for ano in anos:
-        for id_ente in municipios_pb:
-            for periodo in range(1, 7):
-                for anexo in ANEXOS_RREO:
-                    tarefas_rreo_params.append((ano, periodo, id_ente, anexo, None, None))
-            for periodo in range(1, 4):
-                for anexo in ANEXOS_RGF:
-                    tarefas_rgf_params.append((ano, periodo, id_ente, anexo, "E", "Q"))
-            for periodo in range(1, 3):
-                for anexo in ANEXOS_RGF:
-                    tarefas_rgf_params.append((ano, periodo, id_ente, anexo, "E", "S"))
-
-    total_rreo = len(tarefas_rreo_params)
-    total_rgf  = len(tarefas_rgf_params)
-
-    print(f"\n  Malha montada:")
-    print(f"    RREO : {total_rreo:,} requisições")
-    print(f"    RGF  : {total_rgf:,} requisições")
-    print(f"    Total: {total_rreo + total_rgf:,} requisições\n")
-
-    prog_rreo = Progresso(total_rreo, "RREO")
-    prog_rgf  = Progresso(total_rgf,  "RGF ")
-
-    async with httpx.AsyncClient(timeout=45.0, limits=limits) as client:
-
-        tarefas_rreo = [
-            extrair_assincrono(
-                client, "rreo", ano, periodo, id_ente, anexo,
-                semaforo, pausa_global, prog_rreo,
-            )
-            for (ano, periodo, id_ente, anexo, _, __) in tarefas_rreo_params
-        ]
+    inicio = time.time()
+    # Um cliente para tudo (IBGE e SICONFI); pool do tamanho da concorrência,
+    # conexões ociosas mantidas por 30 s entre rajadas
+    limits = httpx.Limits(
+        max_keepalive_connections=MAX_CONCORRENCIA,
+        max_connections=MAX_CONCORRENCIA * 2,
+        keepalive_expiry=30.0,
+    )
 
-        tarefas_rgf = [
-            extrair_assincrono(
-                client, "rgf", ano, periodo, id_ente, anexo,
-                semaforo, pausa_global, prog_rgf,
-                poder=poder, periodicidade=periodicidade,
-            )
-            for (ano, periodo, id_ente, anexo, poder, periodicidade) in tarefas_rgf_params
+    async with httpx.AsyncClient(http2=True, timeout=45.0, limits=limits) as client:
+        municipios_pb = await obter_municipios_pb(client)
+        feitas        = _carregar_checkpoint()
+
+        # Malha como tuplas de parâmetros (baratas); as corrotinas só nascem
+        # dentro dos trabalhadores, uma por vez em cada um. Cada tupla leva os
+        # anexos pendentes de um (ente, ano, período), em ordem.
+        malha      = []
+        total_rreo = 0
+        total_rgf  = 0
+
+        for ano in anos:
+            for id_ente in municipios_pb:
+                for periodo in range(1, 7):
+                    anexos = tuple(a for a in ANEXOS_RREO
+                                   if ("rreo", ano, id_ente, periodo, a) not in feitas)
+                    if anexos:
+                        malha.append(("rreo", ano, periodo, id_ente, anexos, None, None))
+                        total_rreo += len(anexos)
+                for periodicidade, n_periodos in (("Q", 3), ("S", 2)):
+                    for periodo in range(1, n_periodos + 1):
+                        anexos = tuple(a for a in ANEXOS_RGF
+                                       if ("rgf", ano, id_ente, periodo, a, periodicidade) not in feitas)
+                        if anexos:
+                            malha.append(("rgf", ano, periodo, id_ente, anexos, "E", periodicidade))
+                            total_rgf += len(anexos)
+
+        print(f"\n  Malha montada:")
+        print(f"    RREO : {total_rreo:,} requisições")
+        print(f"    RGF  : {total_rgf:,} requisições")
+        print(f"    Total: {total_rreo + total_rgf:,} requisições")
+        if feitas:
+            print(f"    Retomando: {len(feitas):,} tarefas já concluídas no checkpoint")
+        print()
+
+        prog_rreo = Progresso(total_rreo, "RREO")
+        prog_rgf  = Progresso(total_rgf,  "RGF ")
+
+        # Produtor → fila limitada → MAX_CONCORRENCIA trabalhadores → fila de
+        # resultados. As filas limitadas seguram o produtor quando o disco ou a
+        # API ficam para trás, então a memória não cresce com o tamanho da malha.
+        fila       = asyncio.Queue(maxsize=2 * MAX_CONCORRENCIA)
+        resultados = asyncio.Queue(maxsize=2 * MAX_CONCORRENCIA)
+        progresso  = {"rreo": prog_rreo, "rgf": prog_rgf}
+        produtor   = asyncio.create_task(_produtor(fila, malha, MAX_CONCORRENCIA))
+        trabalhadores = [
+            asyncio.create_task(_trabalhador(
+                fila, resultados, client, controle, pausa_global, limitador, progresso,
+            ))
+            for _ in range(MAX_CONCORRENCIA)
         ]
 
-        resultados_rreo, resultados_rgf = await asyncio.gather(
-            asyncio.gather(*tarefas_rreo),
-            asyncio.gather(*tarefas_rgf),
-        )
+        # Cada resultado vai para o disco assim que chega. Só este laço
+        # escreve, então os arquivos dispensam lock. Em modo append, uma
+        # execução retomada soma ao que a anterior já gravou; a tarefa só entra
+        # no checkpoint depois que seus dados estão no disco.
+        try:
+            with open(STAGING_RREO, "ab") as f_rreo, \
+                 open(STAGING_RGF,  "ab") as f_rgf,  \
+                 open(CHECKPOINT,   "ab") as f_done:
+                saidas = {"rreo": f_rreo, "rgf": f_rgf}
+                ativos = MAX_CONCORRENCIA
+                while ativos:
+                    resultado = await resultados.get()
+                    if resultado is None:
+                        ativos -= 1
+                        continue
+                    destino, chave, itens, erro = resultado
+                    if itens:
+                        saidas[destino].write(b"".join(orjson.dumps(item) + b"\n" for item in itens))
+                        saidas[destino].flush()
+                    if not erro:
+                        f_done.write(orjson.dumps({"k": [destino, *chave]}) + b"\n")
+                        f_done.flush()
+            # Trabalhador que caiu por exceção já publicou seu None; aqui a
+            # exceção dele é relançada em vez de a coleta terminar "completa"
+            await asyncio.gather(*trabalhadores)
+            await produtor
+        finally:
+            # Em caso de falha (ou Ctrl+C) no laço, não deixa trabalhadores órfãos
+            for tarefa in (produtor, *trabalhadores):
+                tarefa.cancel()
 
     prog_rreo.finalizar()
     prog_rgf.finalizar()
     print()
 
-    registros_rreo = [item for sub in resultados_rreo if sub for item in sub]
-    registros_rgf  = [item for sub in resultados_rgf  if sub for item in sub]
-
-    if registros_rreo:
+    tabela_rreo = _ler_staging(STAGING_RREO, SCHEMA_RREO)
+    if tabela_rreo.num_rows:
         _salvar_com_merge(
-            pd.DataFrame(registros_rreo),
+            tabela_rreo,
             RAW_DIR / "siconfi_rreo_pb.csv",
             CHAVE_RREO,
             LEGACY_RREO,
         )
     else:
         print("  ⚠️  RREO: nenhum dado retornado.")
+    del tabela_rreo
 
-    if registros_rgf:
+    tabela_rgf = _ler_staging(STAGING_RGF, SCHEMA_RGF)
+    if tabela_rgf.num_rows:
         _salvar_com_merge(
-            pd.DataFrame(registros_rgf),
+            tabela_rgf,
             RAW_DIR / "siconfi_rgf_pb.csv",
             CHAVE_RGF,
             LEGACY_RGF,
@@ -352,6 +654,10 @@ async def orquestrar_coleta(anos: list[int]) -> None:
     else:
         print("  ⚠️  RGF: nenhum dado retornado.")
 
+    STAGING_RREO.unlink(missing_ok=True)
+    STAGING_RGF.unlink(missing_ok=True)
+    CHECKPOINT.unlink(missing_ok=True)
+
     print(f"\n  ⏱  Total: {(time.time() - inicio) / 60:.1f} minutos.")
 
 
@@ -7,6 +7,7 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+import numpy as np
 import pandas as pd
 from scorers.config import LIMIARES_SCORE, N_ANOS_CRONICOS_CAP_MEDIO
 
@@ -58,3 +59,35 @@ def classificar(score, anos_entregues: int, n_anos_cronicos: int) -> str:
         classe = _cap(classe, "🟡 Risco Médio")
 
     return classe
+
+
+def classificar_vec(score: pd.Series, anos_entregues: pd.Series,
+                    n_anos_cronicos: pd.Series) -> pd.Series:
+    """
+    classificar aplicada às colunas inteiras de uma vez (mesmas regras).
+    Trabalha com o índice da classe em ORDEM_RISCO: a classe base sai de um
+    searchsorted nos limiares e cada cap é um np.maximum com o índice do
+    teto, que é o "mais restritivo" de _cap. Devolve uma categórica ordenada
+    na ordem de ORDEM_SORT, montada direto dos códigos.
+    """
+    s     = score.to_numpy(dtype=float)
+    anos  = anos_entregues.to_numpy(dtype=float)
+    cron  = n_anos_cronicos.to_numpy(dtype=float)
+    medio = ORDEM_RISCO.index("🟡 Risco Médio")
+    alto  = ORDEM_RISCO.index("🔴 Risco Alto")
+
+    # ── 1. Classe base via limiares ───────────────────────────────────────
+    # Limiares crescentes: quantos o score já alcançou (0–3) → índice 3–0
+    limiares = [LIMIARES_SCORE["alto"], LIMIARES_SCORE["medio"], LIMIARES_SCORE["baixo"]]
+    idx = len(limiares) - np.searchsorted(limiares, s, side="right")
+
+    # ── 2. Cap RPproc ─────────────────────────────────────────────────────
+    idx = np.where(cron >= N_ANOS_CRONICOS_CAP_MEDIO, np.maximum(idx, medio), idx)
+
+    # ── 3. Cap Qsiconfi ───────────────────────────────────────────────────
+    idx = np.where(anos <= 2, np.maximum(idx, alto),
+          np.where(anos == 3, np.maximum(idx, medio), idx))
+
+    idx[np.isnan(s) | (anos == 0)] = ORDEM_SORT["⚫ Sem Dados"]
+    classes = pd.Categorical.from_codes(idx, categories=list(ORDEM_SORT), ordered=True)
+    return pd.Series(classes, index=score.index)
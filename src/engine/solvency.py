@@ -20,30 +20,59 @@ Rodar individualmente:
   python src/engine/solvency.py
 """
 
+import io
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+import numpy as np
 import pandas as pd
 pd.set_option("future.no_silent_downcasting", True)
 
 from utils.paths import PROCESSED, OUTPUTS
-from scorers.config import PESOS, LIMIARES_SCORE, N_ANOS_CRONICOS_CAP_MEDIO
+from utils.io import ler_tabela
+from scorers.config import PESOS, LIMIARES_SCORE, N_ANOS_CRONICOS_CAP_MEDIO, ANOS_REF
 from scorers.lliq_scorer import calcular as calcular_lliq
 from scorers.eorcam_scorer import calcular as calcular_eorcam
 from scorers.qsiconfi_scorer import calcular as calcular_qsiconfi
 from scorers.cauc_scorer import calcular as calcular_cauc
 from scorers.autonomia_scorer import carregar_dca as calcular_autonomia
 from scorers.rproc_scorer import calcular as calcular_rproc
-from engine.classifier import classificar, ORDEM_SORT
+from engine.classifier import classificar_vec
 
 VERSION = "v7.0.0"
 
 
+def _extremos(score: pd.Series, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Posições dos k maiores e dos k menores scores (NaN fora), na mesma ordem
+    de nlargest/nsmallest com keep="first". Os dois cortes saem de um único
+    np.partition; empates no corte ficam com as primeiras posições.
+    """
+    s     = score.to_numpy(dtype=float)
+    pos   = np.flatnonzero(~np.isnan(s))
+    sv    = s[pos]
+    k     = min(k, len(sv))
+    if k == 0:
+        return pos, pos
+    corte = np.partition(sv, [k - 1, len(sv) - k])
+    lo, hi = corte[k - 1], corte[len(sv) - k]
+
+    def _seleciona(dentro: np.ndarray, no_corte: np.ndarray, sinal: float) -> np.ndarray:
+        faltam  = k - dentro.sum()
+        escolha = dentro | (no_corte & (np.cumsum(no_corte) <= faltam))
+        return pos[escolha][np.lexsort((pos[escolha], sinal * sv[escolha]))]
+
+    topo = _seleciona(sv > hi, sv == hi, -1.0)
+    base = _seleciona(sv < lo, sv == lo,  1.0)
+    return topo, base
+
+
 def run() -> pd.DataFrame:
     """
     Calcula o score de solvência para todos os municípios PB.
-    Salva em data/outputs/score_municipios_pb.csv e data/processed/.
+    Salva data/outputs/score_municipios_pb.csv e data/processed/score_municipios_pb.parquet
+    (lido pelo pncp_agregador.py).
     Retorna o DataFrame final.
     """
 
@@ -72,24 +101,51 @@ def run() -> pd.DataFrame:
                 "Execute as etapas de coleta e processamento antes do score."
             )
 
-    df_si = pd.read_csv(PROCESSED / "siconfi_indicadores_pb.csv", dtype={"cod_ibge": str})
-    df_ca = pd.read_csv(PROCESSED / "cauc_situacao_pb.csv",        dtype={"cod_ibge": str})
-    df_mu = pd.read_csv(PROCESSED / "municipios_pb_tabela.csv",    dtype={"cod_ibge": str})
-
-    df_si["entregou_rreo"] = df_si["entregou_rreo"].astype(str).str.lower() == "true"
-    df_si["lliq_parcial"]  = df_si["lliq_parcial"].astype(str).str.lower()  == "true"
+    # Flags booleanas tipadas pelo próprio parser ("true" do COPY do DuckDB,
+    # "True" de CSVs gravados pelo pandas), sem segunda passada em texto.
+    # O Parquet gravado pelo produtor tem precedência; quando só há o CSV, o
+    # parser é o do Arrow (multithread).
+    df_si = ler_tabela(
+        PROCESSED / "siconfi_indicadores_pb.csv",
+        engine="pyarrow",
+        dtype={"cod_ibge": str, "ano": "int16",
+               "entregou_rreo": bool, "lliq_parcial": bool},
+        true_values=["True", "true"], false_values=["False", "false"],
+    )
+    df_ca = ler_tabela(PROCESSED / "cauc_situacao_pb.csv",
+                       engine="pyarrow", dtype={"cod_ibge": str})
+    df_mu = ler_tabela(PROCESSED / "municipios_pb_tabela.csv",
+                       engine="pyarrow", dtype={"cod_ibge": str})
 
     print(f"  SICONFI : {df_si['cod_ibge'].nunique()} municípios × {df_si['ano'].nunique()} anos")
     print(f"  CAUC    : {len(df_ca)} municípios")
 
+    # Chave categórica comum, com as categorias do cadastro de municípios:
+    # groupbys dos scorers e o join final trabalham sobre códigos inteiros,
+    # sem refazer o hash das strings de cod_ibge em cada bloco
+    tipo_cod = pd.CategoricalDtype(np.sort(df_mu["cod_ibge"].unique()))
+    df_si    = df_si.assign(cod_ibge=df_si["cod_ibge"].astype(tipo_cod))
+    df_ca    = df_ca.assign(cod_ibge=df_ca["cod_ibge"].astype(tipo_cod))
+    df_mu    = df_mu.assign(cod_ibge=df_mu["cod_ibge"].astype(tipo_cod))
+
     # ── 2. Scorers ────────────────────────────────────────────────────────
     print("\n⚙️  Calculando indicadores...")
 
-    df_eorcam   = calcular_eorcam(df_si)
-    df_qsiconfi = calcular_qsiconfi(df_si)
+    # Todos os scorers olham só a janela ANOS_REF: o recorte é feito uma
+    # vez aqui e cada um deles reaproveita o frame já reduzido
+    # ANOS_REF é um intervalo contíguo: duas comparações no array int16
+    # bastam; o np.isin fica só para o caso de a janela ganhar buracos
+    ano = df_si["ano"].to_numpy()
+    if ANOS_REF == list(range(ANOS_REF[0], ANOS_REF[-1] + 1)):
+        df_ref = df_si[(ano >= ANOS_REF[0]) & (ano <= ANOS_REF[-1])]
+    else:
+        df_ref = df_si[np.isin(ano, np.asarray(ANOS_REF, dtype=ano.dtype))]
+
+    df_eorcam   = calcular_eorcam(df_ref)
+    df_qsiconfi = calcular_qsiconfi(df_ref)
     df_cauc     = calcular_cauc(df_ca)
-    df_lliq     = calcular_lliq(df_si, df_mu)
-    df_rproc    = calcular_rproc(df_si)
+    df_lliq     = calcular_lliq(df_ref, df_mu)
+    df_rproc    = calcular_rproc(df_ref)
 
     print("  DCA : carregando dca_indicadores_pb.csv...")
     df_autonomia = calcular_autonomia(df_mu)
@@ -97,29 +153,36 @@ def run() -> pd.DataFrame:
 
     # RPNP — mantido para visualização no dashboard, sem peso no score
     df_rpnp = (
-        df_si[
-            df_si["ano"].isin([2020, 2021, 2022, 2023, 2024, 2025]) &
-            df_si["entregou_rreo"] &
-            df_si["rrestos_nproc_pct"].notna()
-        ]
+        df_ref[df_ref["entregou_rreo"] & df_ref["rrestos_nproc_pct"].notna()]
         .sort_values(["cod_ibge", "ano"], ascending=[True, False])
-        .groupby("cod_ibge").first().reset_index()
+        .groupby("cod_ibge", observed=True).first().reset_index()
         [["cod_ibge", "rrestos_nproc_pct"]]
     )
 
     # ── 3. Join ───────────────────────────────────────────────────────────
-    df = df_mu[["cod_ibge", "ente", "populacao"]].copy()
-    for bloco in [df_eorcam, df_qsiconfi, df_cauc, df_autonomia, df_lliq, df_rpnp, df_rproc]:
-        df = df.merge(bloco, on="cod_ibge", how="left")
-
-    df["qsiconfi"]        = df["qsiconfi"].fillna(0)
-    df["anos_entregues"]  = df["anos_entregues"].fillna(0).astype(int)
-    df["ccauc"]           = df["ccauc"].fillna(1.0)
-    df["lliq_parcial"]    = df["lliq_parcial"].fillna(False).infer_objects(copy=False)
-    df["n_anos_cronicos"] = df["n_anos_cronicos"].fillna(0).astype(int)
-    df["contrib_lliq"]      = df["contrib_lliq"].fillna(0)
-    df["contrib_autonomia"] = df["contrib_autonomia"].fillna(0)
-    df["contrib_rproc"]     = df["contrib_rproc"].fillna(0)
+    # Todos os blocos indexados por cod_ibge e alinhados num único join,
+    # em vez de um merge (e uma fatoração da chave) por bloco. Os campos de
+    # período do RGF só servem ao cálculo do decay e ficam fora do join
+    df_lliq = df_lliq.drop(columns=["lliq_ano", "lliq_periodo", "lliq_periodicidade"])
+    blocos  = [df_eorcam, df_qsiconfi, df_cauc, df_autonomia, df_lliq, df_rpnp, df_rproc]
+    df = (
+        df_mu.set_index("cod_ibge")[["ente", "populacao"]]
+        .join([b.set_index("cod_ibge") for b in blocos], how="left")
+        .reset_index()
+    )
+
+    # Ausências do left join preenchidas numa chamada só, e os tipos
+    # finais num único astype
+    df = df.fillna({
+        "qsiconfi"         : 0,
+        "anos_entregues"   : 0,
+        "ccauc"            : 1.0,
+        "lliq_parcial"     : False,
+        "n_anos_cronicos"  : 0,
+        "contrib_lliq"     : 0,
+        "contrib_autonomia": 0,
+        "contrib_rproc"    : 0,
+    }).astype({"anos_entregues": int, "n_anos_cronicos": int, "lliq_parcial": bool})
 
     print(f"\n  Join  : {len(df)} municípios")
     print(f"  Sem RREO : {df['eorcam_raw'].isna().sum()}")
@@ -128,31 +191,39 @@ def run() -> pd.DataFrame:
           f"{(df['n_anos_cronicos'] >= N_ANOS_CRONICOS_CAP_MEDIO).sum()}")
 
     # ── 4. Score base ─────────────────────────────────────────────────────
-    df["score_base"] = (
-        df["contrib_lliq"]      +
-        df["contrib_eorcam"]    +
-        df["contrib_qsiconfi"]  +
-        df["contrib_ccauc"]     +
-        df["contrib_autonomia"] +
-        df["contrib_rproc"]
-    )
+    # Seções 4 e 5 em arrays NumPy: cada coluna derivada é escrita uma vez,
+    # num único assign no fim, sem uma Series intermediária por passo.
+    # Uma redução só sobre a matriz n×6 de contribuições; NaN propaga como no "+"
+    COLS_CONTRIB = [
+        "contrib_lliq", "contrib_eorcam", "contrib_qsiconfi",
+        "contrib_ccauc", "contrib_autonomia", "contrib_rproc",
+    ]
+    base = df[COLS_CONTRIB].to_numpy(dtype=np.float64).sum(axis=1)
 
     # ── 5. Subtratores situacionais ───────────────────────────────────────
-    df["pen_lliq_parcial"] = df["lliq_parcial"].apply(lambda x: -5.0 if x else 0.0)
-    df["pen_situacional"]  = df[["pen_lliq_parcial"]].sum(axis=1).clip(lower=-10.0)
-    df["score_bruto"]      = (df["score_base"] + df["pen_situacional"]).clip(lower=0)
-    df["score"]            = df["score_bruto"].round(1)
-    df.loc[df["eorcam_raw"].isna(), "score"] = None
+    pen_lliq_parcial = np.where(df["lliq_parcial"].to_numpy(dtype=bool), -5.0, 0.0)
+    pen_situacional  = np.maximum(pen_lliq_parcial, -10.0)  # soma dos subtratores, piso −10
+    bruto            = np.maximum(base + pen_situacional, 0.0)
+    # Sem RREO → sem score
+    score            = np.where(np.isnan(df["eorcam_raw"].to_numpy(dtype=np.float64)),
+                                np.nan, np.round(bruto, 1))
+    df = df.assign(
+        score_base       = base,
+        pen_lliq_parcial = pen_lliq_parcial,
+        pen_situacional  = pen_situacional,
+        score_bruto      = bruto,
+        score            = score,
+    )
 
     # ── 6. Flags ──────────────────────────────────────────────────────────
     df["dado_suspeito"]    = df.get("dado_suspeito_lliq", pd.Series(False, index=df.index)).fillna(False)
-    df["autonomia_critica"] = df["autonomia_media"].notna() & (df["autonomia_media"] < 0.08)
+    df["autonomia_critica"] = df["autonomia_media"].lt(0.08)  # NaN < 0.08 já é False
 
     # ── 7. Classificação ──────────────────────────────────────────────────
-    df["classificacao"] = df.apply(
-        lambda r: classificar(r["score"], r["anos_entregues"], r["n_anos_cronicos"]),
-        axis=1,
-    )
+    # Categórica ordenada na ordem de ORDEM_SORT: a ordenação da exportação
+    # usa os códigos da categoria direto, sem coluna auxiliar
+    df["classificacao"] = classificar_vec(df["score"], df["anos_entregues"], df["n_anos_cronicos"])
+    df["ente"] = df["ente"].astype("category")
 
     # ── 8. Diagnóstico ────────────────────────────────────────────────────
     n_cap_qsi   = (
@@ -184,20 +255,32 @@ def run() -> pd.DataFrame:
         "rrestos_nproc_pct", "qsiconfi", "ccauc", "autonomia_media",
         "dias_atraso", "decay_fator", "dado_suspeito",
     ]
-    print("\n🏆 Top 10:")
-    print(df.nlargest(10, "score")[COLS_DEBUG].to_string(index=False))
-    print("\n⚠️  Bottom 10:")
-    print(df.nsmallest(10, "score")[COLS_DEBUG].to_string(index=False))
-
-    CHAVE = ["João Pessoa", "Campina Grande", "Sousa", "Patos",
-             "Cajazeiras", "Santa Rita", "Bayeux", "Queimadas"]
-    mask = df["ente"].apply(lambda x: any(c.lower() in str(x).lower() for c in CHAVE))
-    print("\n🔎 Municípios-chave:")
-    print(df[mask][[
+    # Municípios-chave pelo código IBGE: isin faz lookup em hash, sem
+    # comparar substrings de nome linha a linha
+    CHAVE = {
+        "2507507": "João Pessoa", "2504009": "Campina Grande",
+        "2516201": "Sousa",       "2510808": "Patos",
+        "2503704": "Cajazeiras",  "2513703": "Santa Rita",
+        "2501807": "Bayeux",      "2512507": "Queimadas",
+    }
+    COLS_CHAVE = [
         "ente", "score", "classificacao", "lliq_raw",
         "n_anos_cronicos", "contrib_lliq", "contrib_rproc",
         "pen_situacional", "dias_atraso", "decay_fator",
-    ]].to_string(index=False))
+    ]
+
+    # As três tabelas são formatadas num buffer e saem numa escrita só
+    topo, base = _extremos(df["score"], 10)
+    buf = io.StringIO()
+    for titulo, tabela in [
+        ("🏆 Top 10:",          df.iloc[topo][COLS_DEBUG]),
+        ("⚠️  Bottom 10:",       df.iloc[base][COLS_DEBUG]),
+        ("🔎 Municípios-chave:", df.loc[df["cod_ibge"].isin(CHAVE), COLS_CHAVE]),
+    ]:
+        buf.write(f"\n{titulo}\n")
+        tabela.to_string(buf=buf, index=False)
+        buf.write("\n")
+    sys.stdout.write(buf.getvalue())
 
     # ── 9. Exportação ─────────────────────────────────────────────────────
     OUT_COLS = [
@@ -215,16 +298,22 @@ def run() -> pd.DataFrame:
         "dado_defasado", "lliq_parcial", "autonomia_critica",
     ]
 
-    df_out = df[OUT_COLS].copy()
-    df_out["_ordem"] = df_out["classificacao"].map(ORDEM_SORT)
-    df_out = (
-        df_out
-        .sort_values(["_ordem", "score"], ascending=[True, False], na_position="last")
-        .drop(columns="_ordem")
-    )
-
-    df_out.to_csv(OUTPUTS  / "score_municipios_pb.csv", index=False, encoding="utf-8-sig")
-    df_out.to_csv(PROCESSED / "score_municipios_pb.csv", index=False, encoding="utf-8-sig")
+    # Classe (códigos da categórica) e depois score decrescente, num lexsort
+    # estável só sobre os dois arrays; -NaN continua NaN e vai para o fim
+    ordem  = np.lexsort((-df["score"].to_numpy(), df["classificacao"].cat.codes.to_numpy()))
+    df_out = df[OUT_COLS].take(ordem)
+
+    # CSV só na pasta de saída (leitura humana); processed/ recebe o Parquet,
+    # que o pncp_agregador lê via ler_tabela com os tipos já resolvidos
+    df_out.to_csv(OUTPUTS / "score_municipios_pb.csv", index=False, encoding="utf-8-sig")
+    # No Parquet, as colunas de pontuação (faixa 0–100, até 4 casas) vão em
+    # float32; os indicadores brutos seguem em float64, com precisão cheia
+    COLS_F32 = [
+        "score", "score_base", "score_bruto", "decay_fator",
+        *[c for c in OUT_COLS if c.startswith(("contrib_", "pen_")) or c.endswith("_norm")],
+    ]
+    (df_out.astype(dict.fromkeys(COLS_F32, "float32"))
+           .to_parquet(PROCESSED / "score_municipios_pb.parquet", compression="zstd", index=False))
 
     print(f"\n✅ Score calculado : {df_out['score'].notna().sum()} municípios")
     print(f"   Versão          : {VERSION}")
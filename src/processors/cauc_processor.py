@@ -3,16 +3,21 @@ Processador CAUC — classifica pendências fiscais dos municípios PB.
 Lê o CSV bruto produzido por src/collectors/cauc.py e deriva:
     bloqueado, qtd_pendencias, pendencias (lista legível por gravidade)
 
-Input:  raw/cauc/cauc_raw_pb.csv
-Output: processed/cauc_situacao_pb.csv
+Input:  raw/cauc/cauc_raw_pb.csv        (ou .parquet, se presente)
+Output: processed/cauc_situacao_pb.csv  (+ .parquet)
 
 Rodar individualmente:
     python src/processors/cauc_processor.py
 """
 
-import pandas as pd
+import sys
 from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
 from datetime import date
+from utils.io import ler_tabela, salvar_tabela
 
 # ── Diretórios ─────────────────────────────────────────────────────────────────
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -54,6 +59,10 @@ REQUISITOS = {
     "5.6":   "SICONFI DCASP",
     "5.7":   "SICONFI MCASP",
 }
+REQUISITOS_KEYS = frozenset(REQUISITOS)
+
+# Pendência identificada por "!" ou campo vazio na coluna do requisito
+MARCADORES_PENDENCIA = frozenset(("!", ""))
 
 
 def run(df_raw: pd.DataFrame | None = None) -> pd.DataFrame:
@@ -75,7 +84,7 @@ def run(df_raw: pd.DataFrame | None = None) -> pd.DataFrame:
                 f"Raw CAUC não encontrado: {path_raw}\n"
                 "Execute primeiro: python src/collectors/cauc.py"
             )
-        df_raw = pd.read_csv(path_raw, dtype=str, na_filter=False)
+        df_raw = ler_tabela(path_raw, dtype=str, na_filter=False)
         print(f"  Lido: {path_raw.name} ({len(df_raw)} linhas)")
 
     # ── Detecta colunas dinâmicas ─────────────────────────────────────────────
@@ -85,38 +94,35 @@ def run(df_raw: pd.DataFrame | None = None) -> pd.DataFrame:
 
     col_nome    = next((c for c in df_raw.columns
                         if "nome" in c.lower() and "ente" in c.lower()), None)
-    colunas_req = [c for c in df_raw.columns if c in REQUISITOS]
-
-    # ── Classificação linha a linha ───────────────────────────────────────────
-    registros = []
-    for _, row in df_raw.iterrows():
-        cod      = row[col_ibge]
-        nome_row = row.get(col_nome, "") if col_nome else ""
-        data_p   = row.get("data_pesquisa", "")
-        data_c   = row.get("data_coleta", HOJE)
-
-        # Pendência identificada por "!" ou campo vazio na coluna do requisito
-        pendencias = [
-            REQUISITOS[c] for c in colunas_req
-            if row.get(c, "").strip() in ("!", "")
-        ]
-        bloqueado = len(pendencias) > 0
-
-        registros.append({
-            "cod_ibge":       cod,
-            "municipio":      nome_row,
-            "bloqueado":      bloqueado,
-            "qtd_pendencias": len(pendencias),
-            "pendencias":     " | ".join(pendencias) if pendencias else "REGULAR",
-            "data_pesquisa":  data_p,
-            "data_coleta":    data_c,
-            "fonte":          "CKAN-TesouroTransparente",
-        })
-
-    df_final = pd.DataFrame(registros)
+    # Posições inteiras das colunas de requisito, para fatiar a matriz com iloc
+    posicoes    = [i for i, c in enumerate(df_raw.columns) if c in REQUISITOS_KEYS]
+    colunas_req = df_raw.columns[posicoes]
+
+    # ── Classificação vetorizada ──────────────────────────────────────────────
+    # Os requisitos usam um alfabeto minúsculo ("!", "", "+", ...): fatoriza a
+    # matriz inteira em códigos inteiros e classifica só os valores distintos.
+    # Código -1 (nulo) cai no False acrescentado ao fim de `pendente`.
+    valores           = df_raw.iloc[:, posicoes].to_numpy(dtype=object)
+    codigos, alfabeto = pd.factorize(valores.ravel())
+    pendente = np.append([str(v).strip() in MARCADORES_PENDENCIA for v in alfabeto], False)
+    flag     = pendente[codigos].reshape(valores.shape)
+    labels   = np.array([REQUISITOS[c] for c in colunas_req])
+    qtd      = flag.sum(axis=1)
+
+    df_final = pd.DataFrame({
+        "cod_ibge":       df_raw[col_ibge].to_numpy(),
+        "municipio":      df_raw[col_nome].to_numpy() if col_nome else "",
+        "bloqueado":      qtd > 0,
+        "qtd_pendencias": qtd,
+        "pendencias":     [" | ".join(labels[linha]) if linha.any() else "REGULAR"
+                           for linha in flag],
+        "data_pesquisa":  df_raw.get("data_pesquisa", pd.Series("", index=df_raw.index)).to_numpy(),
+        "data_coleta":    df_raw.get("data_coleta",   pd.Series(HOJE, index=df_raw.index)).to_numpy(),
+        "fonte":          "CKAN-TesouroTransparente",
+    })
 
     # ── Exportação ────────────────────────────────────────────────────────────
-    df_final.to_csv(OUT_PROC, index=False, encoding="utf-8-sig")
+    salvar_tabela(df_final, OUT_PROC, encoding="utf-8-sig")
 
     bloqueados = df_final["bloqueado"].sum()
     print(f"\n✅ CAUC processado:")
@@ -5,20 +5,25 @@ Lê o CSV bruto produzido por src/collectors/dca.py e deriva:
     autonomia_raw = Receita Tributária / Receita Corrente
 
 Input:
-    raw/dca/dca_raw_pb.csv                    (produzido por collectors/dca.py)
+    raw/dca/dca_raw_pb.csv                    (produzido por collectors/dca.py; .parquet se presente)
     processed/siconfi_indicadores_pb.csv      (fallback de receita corrente via RREO)
 
 Output:
     processed/dca_indicadores_pb_detalhado.csv  — série histórica por município/ano
     processed/dca_indicadores_pb.csv            — médias agregadas por município
+    (ambos também em .parquet)
 
 Rodar individualmente:
     python src/processors/dca_processor.py
 """
 
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
 import pandas as pd
 import logging
-from pathlib import Path
+from utils.io import ler_tabela, salvar_tabela
 
 # ── Configuração ──────────────────────────────────────────────────────────────
 BASE_DIR  = Path(__file__).resolve().parent.parent.parent
@@ -50,7 +55,7 @@ def calcular_indicadores(df: pd.DataFrame,
         df_detalhado — série histórica com scaixa_raw e autonomia_raw por ano
         df_media     — médias agregadas por município (entrada para solvency.py)
     """
-    df = df.copy()
+    # Sem cópia defensiva: o merge (ou o assign) abaixo já devolve um frame novo
 
     # ── Fallback de receita corrente via RREO ─────────────────────────────────
     for col_candidata in ["receita_realizada", "rcl", "receita_corrente_liquida"]:
@@ -64,39 +69,17 @@ def calcular_indicadores(df: pd.DataFrame,
             df = df.merge(rcl_rreo, on="cod_ibge", how="left")
             break
     else:
-        df["rcl_rreo"] = float("nan")
+        df = df.assign(rcl_rreo=float("nan"))
 
     df["rcl_rreo"]           = pd.to_numeric(df["rcl_rreo"],     errors="coerce")
     df["rec_corrente"]       = pd.to_numeric(df["rec_corrente"], errors="coerce")
     df["rec_corrente_final"] = df["rec_corrente"].fillna(df["rcl_rreo"])
 
-    # ── Scaixa ────────────────────────────────────────────────────────────────
-    df["scaixa_raw"] = float("nan")
-    mask_sc = (
-        df["ativo_financeiro"].notna()   &
-        df["passivo_financeiro"].notna() &
-        df["rec_corrente_final"].notna() &
-        (df["rec_corrente_final"] > 0)
-    )
-    df.loc[mask_sc, "scaixa_raw"] = (
-        (df.loc[mask_sc, "ativo_financeiro"] - df.loc[mask_sc, "passivo_financeiro"]) /
-        df.loc[mask_sc, "rec_corrente_final"]
-    )
-
-    # ── Autonomia ─────────────────────────────────────────────────────────────
-    df["autonomia_raw"] = float("nan")
-    mask_au = (
-        df["rec_tributaria"].notna()      &
-        df["rec_corrente_final"].notna()  &
-        (df["rec_corrente_final"] > 0)
-    )
-    df.loc[mask_au, "autonomia_raw"] = (
-        df.loc[mask_au, "rec_tributaria"] /
-        df.loc[mask_au, "rec_corrente_final"]
-    )
-
-    df["scaixa_raw"]    = pd.to_numeric(df["scaixa_raw"],    errors="coerce")
-    df["autonomia_raw"] = pd.to_numeric(df["autonomia_raw"], errors="coerce")
+    # ── Scaixa e Autonomia ────────────────────────────────────────────────────
+    # Denominador não positivo vira NaN; NaN propaga nas divisões sem máscaras
+    rc = df["rec_corrente_final"].where(df["rec_corrente_final"] > 0)
+    df["scaixa_raw"]    = (df["ativo_financeiro"] - df["passivo_financeiro"]) / rc
+    df["autonomia_raw"] =  df["rec_tributaria"] / rc
 
     # ── Média 2020–2024 por município ─────────────────────────────────────────
     media = (
@@ -165,7 +148,7 @@ def run(df_raw: pd.DataFrame | None = None) -> pd.DataFrame:
                 f"Raw DCA não encontrado: {path_raw}\n"
                 "Execute primeiro: python src/collectors/dca.py"
             )
-        df_raw = pd.read_csv(path_raw, dtype={"cod_ibge": str})
+        df_raw = ler_tabela(path_raw, dtype={"cod_ibge": str})
         log.info(f"  Raw DCA: {len(df_raw)} linhas")
 
     # ── Fallback RREO (receita corrente) ──────────────────────────────────────
@@ -182,8 +165,8 @@ def run(df_raw: pd.DataFrame | None = None) -> pd.DataFrame:
     df_det, df_media = calcular_indicadores(df_raw, df_rreo)
 
     # ── Exportação ────────────────────────────────────────────────────────────
-    df_det.to_csv(PROCESSED   / "dca_indicadores_pb_detalhado.csv", index=False)
-    df_media.to_csv(PROCESSED / "dca_indicadores_pb.csv",           index=False)
+    salvar_tabela(df_det,   PROCESSED / "dca_indicadores_pb_detalhado.csv")
+    salvar_tabela(df_media, PROCESSED / "dca_indicadores_pb.csv")
     log.info(f"  ✅ Processado: {PROCESSED / 'dca_indicadores_pb.csv'}")
 
     # ── Diagnóstico ───────────────────────────────────────────────────────────
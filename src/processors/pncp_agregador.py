@@ -6,7 +6,7 @@ Responsabilidades:
 1. Ler processed/pncp_licitacoes_pb.csv   (produzido por pncp_processor.py)
 2. Filtrar para os últimos 12 meses (dataPublicacaoPncp)
 3. Agregar por município: volume, valor homologado, padrão de compra, temporalidade
-4. Fazer merge com outputs/score_municipios_pb.csv (output do solvency.py)
+4. Fazer merge com processed/score_municipios_pb.parquet (output do solvency.py)
 5. Exportar outputs/score_municipios_pb_pncp.csv para uso no app e no relatório
 
 Não recalcula scores — apenas enriquece o output do solvency.py com
@@ -18,7 +18,7 @@ refletem apenas esse período.
 
 Input:
     processed/pncp_licitacoes_pb.csv   (produzido por pncp_processor.py)
-    outputs/score_municipios_pb.csv    (produzido por solvency.py)
+    processed/score_municipios_pb.parquet (produzido por solvency.py)
 
 Output:
     outputs/score_municipios_pb_pncp.csv
@@ -34,6 +34,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 import pandas as pd
 import numpy as np
 from utils.paths import PROCESSED, OUTPUTS
+from utils.io import ler_tabela
 
 # Modalidades que dispensam competição (IDs fixos da Lei 14.133/2021)
 MODALIDADES_SEM_LICITACAO = {8, 9}  # 8 = Dispensa, 9 = Inexigibilidade
@@ -56,13 +57,19 @@ def run() -> pd.DataFrame:
     # ── 1. Carga ──────────────────────────────────────────────────────────────
     print("\n📂 Carregando dados...")
 
-    pncp  = pd.read_csv(PROCESSED / "pncp_licitacoes_pb.csv",
-                        dtype={"municipio_ibge": str})
-    score = pd.read_csv(OUTPUTS / "score_municipios_pb.csv",
-                        dtype={"cod_ibge": str})
+    pncp  = ler_tabela(PROCESSED / "pncp_licitacoes_pb.csv",
+                       dtype={"municipio_ibge": str})
+    arq_score = PROCESSED / "score_municipios_pb.parquet"
+    if not arq_score.exists():
+        raise FileNotFoundError(
+            f"Score não encontrado: {arq_score}\n"
+            "Execute primeiro: python src/engine/solvency.py"
+        )
+    # O Parquet traz cod_ibge já com 7 dígitos, como categórica; vira texto
+    # para o merge com as chaves do PNCP
+    score = pd.read_parquet(arq_score).astype({"cod_ibge": str})
 
     pncp["municipio_ibge"] = pncp["municipio_ibge"].str.zfill(7)
-    score["cod_ibge"]      = score["cod_ibge"].str.zfill(7)
 
     print(f"  PNCP  : {len(pncp):,} licitações | "
           f"{pncp['municipio_ibge'].nunique()} municípios (histórico completo)")
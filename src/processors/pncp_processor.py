@@ -7,20 +7,28 @@ Lê o JSONL produzido por src/collectors/pncp.py e realiza:
     4. Exportação para processed/
 
 Input:
-    raw/pncp/pncp_parcial.jsonl   (produzido por collectors/pncp.py)
+    raw/pncp/blocos/*.jsonl.zst       (produzido por collectors/pncp.py, um por
+                                       bloco; o pncp_parcial.jsonl de versões
+                                       anteriores ainda é aceito)
 
 Output:
-    processed/pncp_licitacoes_pb.csv   — base para pncp_agregador.py
-    raw/pncp/pncp_snapshot_{HOJE}.csv  — snapshot datado
+    processed/pncp_licitacoes_pb.csv   — base para pncp_agregador.py (+ .parquet)
+    raw/pncp/pncp_snapshot_{HOJE}.csv  — snapshot datado (cópia do CSV acima)
 
 Rodar individualmente:
     python src/processors/pncp_processor.py
 """
 
-import json
-import pandas as pd
+import io
+import shutil
+import sys
 from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import orjson
+import pandas as pd
 from datetime import date
+from utils.io import ler_linhas_zst, salvar_tabela
 
 # ── Diretórios ─────────────────────────────────────────────────────────────────
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -41,6 +49,72 @@ KEEP = [
     "_modalidade", "_modalidade_nome", "_mes",
 ]
 
+# Subcampos extraídos dos objetos aninhados → nome da coluna achatada
+CAMPOS_ORGAO = {
+    "cnpj":        "orgao_cnpj",
+    "razaoSocial": "orgao_razaoSocial",
+    "esferaId":    "orgao_esfera",
+}
+CAMPOS_UNIDADE = {
+    "codigoIbge":    "municipio_ibge",
+    "municipioNome": "municipio_nome",
+    "ufSigla":       "uf_unidade",
+    "nomeUnidade":   "nomeUnidade",
+}
+
+
+def _ler_jsonl(caminhos: list[Path]) -> pd.DataFrame:
+    """
+    JSONL(s) → DataFrame pelo leitor colunar do pandas, sem inferência de
+    tipos/datas (valores ficam como vieram da API). Arquivos .zst são
+    descomprimidos em fluxo e concatenados na ordem recebida.
+
+    Marcadores de bloco vazio (_sem_dados) são descartados ainda em bytes:
+    se entrassem no parse, as colunas inteiras ganhariam NaN e virariam float.
+    Se houver linha corrompida (coleta interrompida no meio de uma escrita),
+    refaz a leitura linha a linha descartando só as inválidas.
+    """
+    def _linhas(caminho: Path):
+        if caminho.suffix == ".zst":
+            yield from ler_linhas_zst(caminho)
+        else:
+            with open(caminho, "rb") as fj:
+                yield from fj
+
+    dados = b"".join(linha for caminho in caminhos for linha in _linhas(caminho)
+                     if b'"_sem_dados"' not in linha)
+    if not dados.strip():
+        return pd.DataFrame()
+
+    try:
+        return pd.read_json(io.BytesIO(dados), lines=True, dtype=False, convert_dates=False)
+    except ValueError:
+        print("[WARNING] JSONL com linhas inválidas — relendo linha a linha.")
+        linhas = []
+        for linha in dados.splitlines():
+            try:
+                linhas.append(orjson.loads(linha))
+            except orjson.JSONDecodeError:
+                pass
+        return pd.DataFrame(linhas)
+
+
+def _achatar(df: pd.DataFrame, coluna: str, campos: dict[str, str]) -> pd.DataFrame:
+    """
+    Substitui a coluna de dicts por colunas planas, numa passada de
+    json_normalize. Subcampo ausente (ou objeto nulo) vira "".
+    """
+    objetos = [x if isinstance(x, dict) else {} for x in df[coluna]]
+    plano   = (
+        pd.json_normalize(objetos, max_level=0)
+        .reindex(columns=list(campos))
+        .fillna("")
+        .rename(columns=campos)
+    )
+    plano.index = df.index
+    descartar   = [coluna, *(c for c in campos.values() if c in df.columns)]
+    return pd.concat([df.drop(columns=descartar), plano], axis=1)
+
 
 def run() -> pd.DataFrame:
     """
@@ -49,58 +123,44 @@ def run() -> pd.DataFrame:
 
     Retorna o DataFrame processado.
     """
-    snap_jsonl = RAW_DIR / "pncp_parcial.jsonl"
-    if not snap_jsonl.exists():
+    blocos = sorted((RAW_DIR / "blocos").glob("*.jsonl.zst"))
+    if not blocos and (RAW_DIR / "pncp_parcial.jsonl").exists():
+        blocos = [RAW_DIR / "pncp_parcial.jsonl"]   # checkpoint de versões anteriores
+    if not blocos:
         raise FileNotFoundError(
-            f"JSONL não encontrado: {snap_jsonl}\n"
+            f"Checkpoint PNCP não encontrado em: {RAW_DIR / 'blocos'}\n"
             "Execute primeiro: python src/collectors/pncp.py"
         )
 
     # ── 1. Consolidação JSONL → DataFrame ─────────────────────────────────────
     print("[INFO] Lendo JSONL...")
-    linhas = []
-    with open(snap_jsonl, "r", encoding="utf-8") as fj:
-        for linha in fj:
-            try:
-                obj = json.loads(linha)
-                if not obj.get("_sem_dados"):
-                    linhas.append(obj)
-            except Exception:
-                pass
+    df = _ler_jsonl(blocos)
 
-    if not linhas:
+    if df.empty:
         print("[WARNING] Nenhum dado disponível no JSONL.")
         return pd.DataFrame()
 
-    df = pd.DataFrame(linhas)
     print(f"[INFO] {len(df):,} registros carregados do JSONL")
 
     # ── 2. Flattening de campos aninhados ─────────────────────────────────────
     if "orgaoEntidade" in df.columns:
-        org = df["orgaoEntidade"].apply(lambda x: x if isinstance(x, dict) else {})
-        df["orgao_cnpj"]        = org.apply(lambda x: x.get("cnpj", ""))
-        df["orgao_razaoSocial"] = org.apply(lambda x: x.get("razaoSocial", ""))
-        df["orgao_esfera"]      = org.apply(lambda x: x.get("esferaId", ""))
-        df.drop(columns=["orgaoEntidade"], inplace=True)
+        df = _achatar(df, "orgaoEntidade", CAMPOS_ORGAO)
 
     if "unidadeOrgao" in df.columns:
-        uni = df["unidadeOrgao"].apply(lambda x: x if isinstance(x, dict) else {})
-        df["municipio_ibge"] = uni.apply(lambda x: x.get("codigoIbge", ""))
-        df["municipio_nome"] = uni.apply(lambda x: x.get("municipioNome", ""))
-        df["uf_unidade"]     = uni.apply(lambda x: x.get("ufSigla", ""))
-        df["nomeUnidade"]    = uni.apply(lambda x: x.get("nomeUnidade", ""))
-        df.drop(columns=["unidadeOrgao"], inplace=True)
+        df = _achatar(df, "unidadeOrgao", CAMPOS_UNIDADE)
 
     # ── 3. Seleção de colunas ─────────────────────────────────────────────────
     df_out = df[[c for c in KEEP if c in df.columns]].copy()
 
     # ── 4. Exportação ─────────────────────────────────────────────────────────
-    df_out.to_csv(OUT_PROC, index=False, encoding="utf-8-sig")
+    # Serializa uma vez (CSV + Parquet/zstd); o snapshot datado é cópia do CSV
+    salvar_tabela(df_out, OUT_PROC, encoding="utf-8-sig")
 
     snap_csv = RAW_DIR / f"pncp_snapshot_{HOJE}.csv"
-    df_out.to_csv(snap_csv, index=False, encoding="utf-8-sig")
+    shutil.copyfile(OUT_PROC, snap_csv)
 
-    muns = df_out["municipio_ibge"].replace("", pd.NA).nunique() if "municipio_ibge" in df_out.columns else "N/A"
+    muns = (df_out.loc[df_out["municipio_ibge"] != "", "municipio_ibge"].nunique()
+            if "municipio_ibge" in df_out.columns else "N/A")
     print(f"\n[SUCCESS] PNCP processado")
     print(f"   Registros         : {len(df_out):,}")
     print(f"   Municípios        : {muns}")
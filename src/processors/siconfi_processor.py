@@ -4,8 +4,8 @@ Processa RREO (Anexos 01 e 07) e RGF (Anexo 05) para gerar
 os indicadores de entrada do solvency.py.
 
 Input:
-    raw/siconfi/siconfi_rreo_pb.csv   (produzido por collectors/siconfi.py)
-    raw/siconfi/siconfi_rgf_pb.csv    (produzido por collectors/siconfi.py)
+    raw/siconfi/siconfi_rreo_pb.csv   (produzido por collectors/siconfi.py; .parquet se presente)
+    raw/siconfi/siconfi_rgf_pb.csv    (produzido por collectors/siconfi.py; .parquet se presente)
     processed/municipios_pb_tabela.csv
 
 Output:
@@ -19,15 +19,62 @@ Rodar individualmente:
     python src/processors/siconfi_processor.py
 """
 
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
 import duckdb
+import hashlib
 import pandas as pd
-from pathlib import Path
+from utils.io import origem_tabela
 
 BASE_DIR       = Path(__file__).resolve().parent.parent.parent
 CSV_RREO       = BASE_DIR / "data" / "raw" / "siconfi" / "siconfi_rreo_pb.csv"
 CSV_RGF        = BASE_DIR / "data" / "raw" / "siconfi" / "siconfi_rgf_pb.csv"
 CSV_MUNICIPIOS = BASE_DIR / "data" / "processed" / "municipios_pb_tabela.csv"
 OUT            = BASE_DIR / "data" / "processed" / "siconfi_indicadores_pb.csv"
+OUT_HASH       = OUT.with_suffix(".hash")
+
+# Cada arquivo é lido uma única vez, só com as colunas usadas; QUERY
+# referencia as tabelas temporárias resultantes. {fonte} é o Parquet gravado
+# pelo coletor ou, na falta dele, o CSV. Os tipos são fixados aqui porque a
+# base mesclada pelo coletor chega toda como texto ("nan" vira NULL).
+CARGA_RREO = """
+    CREATE TEMP TABLE rreo AS
+    SELECT CAST(cod_ibge  AS BIGINT)  AS cod_ibge,
+           CAST(exercicio AS INTEGER) AS exercicio,
+           CAST(periodo   AS INTEGER) AS periodo,
+           anexo, cod_conta, coluna, conta,
+           NULLIF(TRY_CAST(valor AS DOUBLE), 'NaN'::DOUBLE) AS valor
+    FROM {fonte}
+"""
+CARGA_RGF = """
+    CREATE TEMP TABLE rgf AS
+    SELECT CAST(cod_ibge  AS BIGINT)  AS cod_ibge,
+           CAST(exercicio AS INTEGER) AS exercicio,
+           CAST(periodo   AS INTEGER) AS periodo,
+           periodicidade, anexo, cod_conta, conta,
+           NULLIF(TRY_CAST(valor AS DOUBLE), 'NaN'::DOUBLE) AS valor
+    FROM {fonte}
+    WHERE anexo = 'RGF-Anexo 05'
+"""
+# No fallback CSV, as colunas usadas são lidas como texto fixo (os CASTs acima
+# tipam): o sniffer não gasta amostragem com elas e o leitor só materializa o
+# que o SELECT projeta — as demais colunas do dump nem são convertidas.
+LEITOR_CSV_RREO = """read_csv($arq, types={
+    'cod_ibge': 'VARCHAR', 'exercicio': 'VARCHAR', 'periodo': 'VARCHAR', 'anexo': 'VARCHAR',
+    'cod_conta': 'VARCHAR', 'coluna': 'VARCHAR', 'conta': 'VARCHAR', 'valor': 'VARCHAR'
+})"""
+LEITOR_CSV_RGF = """read_csv($arq, quote='"', types={
+    'cod_ibge': 'VARCHAR', 'exercicio': 'VARCHAR', 'periodo': 'VARCHAR', 'periodicidade': 'VARCHAR',
+    'anexo': 'VARCHAR', 'cod_conta': 'VARCHAR', 'conta': 'VARCHAR', 'valor': 'VARCHAR'
+})"""
+
+CARGA_MUNICIPIOS = """
+    CREATE TEMP TABLE municipios AS
+    SELECT cod_ibge, ente, populacao
+    FROM read_csv_auto($arq)
+"""
 
 QUERY = """
 WITH
@@ -36,20 +83,21 @@ WITH
 -- gerem linhas 100% NULL no output e contaminem o score.
 anos_com_dados AS (
     SELECT DISTINCT exercicio AS ano
-    FROM read_csv_auto($csv_rreo)
+    FROM rreo
     WHERE cod_conta IS NOT NULL
       AND valor    IS NOT NULL
 ),
 malha_base AS (
     SELECT m.cod_ibge, m.ente AS instituicao, m.populacao, a.ano
-    FROM read_csv_auto($csv_municipios) m
+    FROM municipios m
     CROSS JOIN anos_com_dados a
 ),
 
+-- Só o último bimestre entregue de cada município/ano, numa passada de janela
 ultimo_periodo_rreo AS (
-    SELECT cod_ibge, exercicio AS ano, MAX(periodo) AS max_periodo
-    FROM read_csv_auto($csv_rreo)
-    GROUP BY cod_ibge, exercicio
+    SELECT *
+    FROM rreo
+    QUALIFY periodo = MAX(periodo) OVER (PARTITION BY cod_ibge, exercicio)
 ),
 
 dados_rreo AS (
@@ -57,49 +105,45 @@ dados_rreo AS (
         s.cod_ibge,
         s.exercicio AS ano,
 
-        MAX(CASE
-            WHEN s.anexo     = 'RREO-Anexo 01'
-            AND  s.cod_conta = 'ReceitasExcetoIntraOrcamentarias'
-            AND  s.coluna    = 'Até o Bimestre (c)'
-            THEN s.valor END) AS receita_realizada,
-
-        MAX(CASE
-            WHEN s.anexo     = 'RREO-Anexo 01'
-            AND  s.cod_conta = 'ReceitasExcetoIntraOrcamentarias'
-            AND  s.coluna    = 'PREVISÃO ATUALIZADA (a)'
-            THEN s.valor END) AS receita_prevista,
-
-        MAX(CASE
-            WHEN s.anexo     = 'RREO-Anexo 01'
-            AND  s.cod_conta = 'TotalDespesas'
-            AND  s.coluna    = 'DESPESAS LIQUIDADAS ATÉ O BIMESTRE (h)'
-            THEN s.valor END) AS despesa_liquidada,
-
-        MAX(CASE
-            WHEN s.anexo     = 'RREO-Anexo 07'
-            AND  s.cod_conta = 'RestosAPagarNaoProcessadosAPagar'
-            AND  s.coluna    = 'Saldo k = (f + g) - (i + j)'
-            AND  s.conta     = 'TOTAL (III) = (I + II)'
-            THEN s.valor END) AS rrestos_nao_processados,
-
-        MAX(CASE
-            WHEN s.anexo     = 'RREO-Anexo 07'
-            AND  s.cod_conta = 'RestosAPagarProcessadosENaoProcessadosLiquidadosAPagar'
-            AND  s.coluna    = 'Saldo e = (a+ b) - (c + d)'
-            AND  s.conta     = 'TOTAL (III) = (I + II)'
-            THEN s.valor END) AS rrestos_processados
-
-    FROM read_csv_auto($csv_rreo) s
-    JOIN ultimo_periodo_rreo up
-      ON s.cod_ibge  = up.cod_ibge
-     AND s.exercicio = up.ano
-     AND s.periodo   = up.max_periodo
+        MAX(s.valor) FILTER (
+            WHERE s.anexo     = 'RREO-Anexo 01'
+              AND s.cod_conta = 'ReceitasExcetoIntraOrcamentarias'
+              AND s.coluna    = 'Até o Bimestre (c)'
+        ) AS receita_realizada,
+
+        MAX(s.valor) FILTER (
+            WHERE s.anexo     = 'RREO-Anexo 01'
+              AND s.cod_conta = 'ReceitasExcetoIntraOrcamentarias'
+              AND s.coluna    = 'PREVISÃO ATUALIZADA (a)'
+        ) AS receita_prevista,
+
+        MAX(s.valor) FILTER (
+            WHERE s.anexo     = 'RREO-Anexo 01'
+              AND s.cod_conta = 'TotalDespesas'
+              AND s.coluna    = 'DESPESAS LIQUIDADAS ATÉ O BIMESTRE (h)'
+        ) AS despesa_liquidada,
+
+        MAX(s.valor) FILTER (
+            WHERE s.anexo     = 'RREO-Anexo 07'
+              AND s.cod_conta = 'RestosAPagarNaoProcessadosAPagar'
+              AND s.coluna    = 'Saldo k = (f + g) - (i + j)'
+              AND s.conta     = 'TOTAL (III) = (I + II)'
+        ) AS rrestos_nao_processados,
+
+        MAX(s.valor) FILTER (
+            WHERE s.anexo     = 'RREO-Anexo 07'
+              AND s.cod_conta = 'RestosAPagarProcessadosENaoProcessadosLiquidadosAPagar'
+              AND s.coluna    = 'Saldo e = (a+ b) - (c + d)'
+              AND s.conta     = 'TOTAL (III) = (I + II)'
+        ) AS rrestos_processados
+
+    FROM ultimo_periodo_rreo s
     GROUP BY s.cod_ibge, s.exercicio
 ),
 
 ultimo_periodo_rgf AS (
     SELECT cod_ibge, exercicio AS ano, periodicidade, MAX(periodo) AS max_periodo
-    FROM read_csv($csv_rgf, quote='"')
+    FROM rgf
     WHERE anexo = 'RGF-Anexo 05'
     GROUP BY cod_ibge, exercicio, periodicidade
 ),
@@ -120,27 +164,27 @@ dados_rgf AS (
         rp.periodicidade     AS periodicidade_rgf,
         rp.max_periodo       AS periodo_rgf,
 
-        MAX(CASE
-            WHEN r.cod_conta = 'DisponibilidadeDeCaixaLiquidaAposRP'
-            AND  r.conta     = 'TOTAL (IV) = (I + II + III)'
-            THEN r.valor END) AS dcl_apos_rp_total,
+        MAX(r.valor) FILTER (
+            WHERE r.cod_conta = 'DisponibilidadeDeCaixaLiquidaAposRP'
+              AND r.conta     = 'TOTAL (IV) = (I + II + III)'
+        ) AS dcl_apos_rp_total,
 
-        MAX(CASE
-            WHEN r.cod_conta = 'DisponibilidadeDeCaixaLiquidaAposRP'
-            AND  r.conta     = 'TOTAL DOS RECURSOS VINCULADOS AO RPPS (III)'
-            THEN r.valor END) AS dcl_apos_rp_rpps,
+        MAX(r.valor) FILTER (
+            WHERE r.cod_conta = 'DisponibilidadeDeCaixaLiquidaAposRP'
+              AND r.conta     = 'TOTAL DOS RECURSOS VINCULADOS AO RPPS (III)'
+        ) AS dcl_apos_rp_rpps,
 
-        MAX(CASE
-            WHEN r.cod_conta = 'DisponibilidadeDeCaixaLiquida'
-            AND  r.conta     = 'TOTAL (IV) = (I + II + III)'
-            THEN r.valor END) AS dcl_pre_rp_total,
+        MAX(r.valor) FILTER (
+            WHERE r.cod_conta = 'DisponibilidadeDeCaixaLiquida'
+              AND r.conta     = 'TOTAL (IV) = (I + II + III)'
+        ) AS dcl_pre_rp_total,
 
-        MAX(CASE
-            WHEN r.cod_conta = 'DisponibilidadeDeCaixaLiquida'
-            AND  r.conta     = 'TOTAL DOS RECURSOS VINCULADOS AO RPPS (III)'
-            THEN r.valor END) AS dcl_pre_rp_rpps
+        MAX(r.valor) FILTER (
+            WHERE r.cod_conta = 'DisponibilidadeDeCaixaLiquida'
+              AND r.conta     = 'TOTAL DOS RECURSOS VINCULADOS AO RPPS (III)'
+        ) AS dcl_pre_rp_rpps
 
-    FROM read_csv($csv_rgf, quote='"') r
+    FROM rgf r
     JOIN regime_prioritario rp
       ON r.cod_ibge      = rp.cod_ibge
      AND r.exercicio     = rp.ano
@@ -149,27 +193,115 @@ dados_rgf AS (
      AND rp.prioridade   = 1
     WHERE r.anexo = 'RGF-Anexo 05'
     GROUP BY r.cod_ibge, r.exercicio, rp.periodicidade, rp.max_periodo
+),
+
+malha AS (
+    SELECT
+        mb.cod_ibge, mb.instituicao, mb.ano, mb.populacao,
+        dr.receita_prevista, dr.receita_realizada, dr.despesa_liquidada,
+        dr.rrestos_nao_processados, dr.rrestos_processados,
+        rg.dcl_apos_rp_total, rg.dcl_apos_rp_rpps,
+        rg.dcl_pre_rp_total,  rg.dcl_pre_rp_rpps,
+        rg.periodicidade_rgf, rg.periodo_rgf
+
+    FROM malha_base mb
+    LEFT JOIN dados_rreo dr ON mb.cod_ibge = dr.cod_ibge AND mb.ano = dr.ano
+    LEFT JOIN dados_rgf  rg ON mb.cod_ibge = rg.cod_ibge AND mb.ano = rg.ano
+),
+
+-- Lliq v6.1: DCL pós-RP (excl. RPPS); sem ela, DCL pré-RP marcada como parcial
+com_lliq AS (
+    SELECT
+        *,
+        CASE WHEN receita_realizada > 0 THEN
+            CASE
+                WHEN dcl_apos_rp_total IS NOT NULL
+                THEN dcl_apos_rp_total - COALESCE(dcl_apos_rp_rpps, 0)
+                WHEN dcl_pre_rp_total  IS NOT NULL
+                THEN dcl_pre_rp_total  - COALESCE(dcl_pre_rp_rpps, 0)
+            END
+        END AS lliq_bruta,
+
+        COALESCE(
+            receita_realizada > 0
+            AND dcl_apos_rp_total IS NULL
+            AND dcl_pre_rp_total  IS NOT NULL,
+            FALSE) AS lliq_parcial
+    FROM malha
 )
 
+-- Denominadores não positivos → NULL (mesma regra da versão em pandas)
 SELECT
-    mb.cod_ibge, mb.instituicao, mb.ano, mb.populacao,
-    dr.receita_prevista, dr.receita_realizada, dr.despesa_liquidada,
-    dr.rrestos_nao_processados, dr.rrestos_processados,
-    rg.dcl_apos_rp_total, rg.dcl_apos_rp_rpps,
-    rg.dcl_pre_rp_total,  rg.dcl_pre_rp_rpps,
-    rg.periodicidade_rgf, rg.periodo_rgf
-
-FROM malha_base mb
-LEFT JOIN dados_rreo dr ON mb.cod_ibge = dr.cod_ibge AND mb.ano = dr.ano
-LEFT JOIN dados_rgf  rg ON mb.cod_ibge = rg.cod_ibge AND mb.ano = rg.ano
-ORDER BY mb.instituicao, mb.ano
+    cod_ibge, instituicao, ano, CAST(populacao AS INTEGER) AS populacao,
+    receita_prevista, receita_realizada, despesa_liquidada,
+    rrestos_nao_processados, rrestos_processados,
+    dcl_apos_rp_total, dcl_apos_rp_rpps,
+    dcl_pre_rp_total,  dcl_pre_rp_rpps,
+    periodicidade_rgf, periodo_rgf,
+
+    receita_prevista IS NOT NULL AS entregou_rreo,
+
+    CASE WHEN receita_prevista > 0
+         THEN ROUND(receita_realizada / receita_prevista * 100, 2) END AS eorcam,
+    CASE WHEN receita_realizada > 0
+         THEN ROUND(rrestos_nao_processados / receita_realizada * 100, 2) END AS rrestos_nproc_pct,
+    CASE WHEN receita_realizada > 0
+         THEN ROUND(rrestos_processados / receita_realizada * 100, 2) END AS rproc_pct,
+    CASE WHEN receita_realizada > 0
+         THEN ROUND((despesa_liquidada - receita_realizada) / receita_realizada * 100, 2) END AS deficit_pct,
+
+    ROUND(lliq_bruta / receita_realizada, 6) AS lliq,
+    lliq_bruta,
+    lliq_parcial
+
+FROM com_lliq
+ORDER BY instituicao, ano
 """
 
+# Indicadores cuja ausência simultânea caracteriza um ano sem entrega alguma
+COLUNAS_INDICADORES = [
+    "receita_prevista", "receita_realizada", "despesa_liquidada",
+    "rrestos_nao_processados", "rrestos_processados",
+    "dcl_apos_rp_total", "dcl_pre_rp_total",
+]
+
+
+def _fonte(csv: Path, leitor_csv: str) -> tuple[str, Path]:
+    """
+    (expressão de leitura, arquivo): o Parquet ao lado do CSV se existir e não
+    for mais antigo que ele; senão o próprio CSV com `leitor_csv`.
+    """
+    origem = origem_tabela(csv)
+    if origem.suffix == ".parquet":
+        return "read_parquet($arq)", origem
+    return leitor_csv, origem
+
 
-def _filtrar_anos_sem_dados(df: pd.DataFrame) -> pd.DataFrame:
+def _assinatura_entradas() -> str | None:
     """
-    Remove linhas onde o município não entregou absolutamente nenhum dado
-    no ano — ou seja, todos os indicadores fiscais são NULL.
+    Assinatura de tudo que determina OUT: os hashes gravados pelo coletor ao
+    lado de RREO/RGF, o conteúdo da tabela de municípios e o SQL deste módulo.
+    None se algum hash do coletor faltar ou for mais antigo que o arquivo que
+    seria lido (ex.: CSV editado à mão) — nesse caso não há atalho.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for csv in (CSV_RREO, CSV_RGF):
+        sidecar = csv.with_suffix(".hash")
+        if not sidecar.exists() or sidecar.stat().st_mtime < origem_tabela(csv).stat().st_mtime:
+            return None
+        h.update(sidecar.read_bytes())
+    h.update(CSV_MUNICIPIOS.read_bytes())
+    for sql in (CARGA_RREO, CARGA_RGF, CARGA_MUNICIPIOS, LEITOR_CSV_RREO, LEITOR_CSV_RGF,
+                QUERY, *COLUNAS_INDICADORES):
+        h.update(sql.encode())
+    return h.hexdigest()
+
+
+def _filtrar_anos_sem_dados(con: duckdb.DuckDBPyConnection) -> None:
+    """
+    Remove da tabela `indicadores` as linhas onde o município não entregou
+    absolutamente nenhum dado no ano — ou seja, todos os indicadores fiscais
+    são NULL.
 
     Isso evita que anos coletados mas ainda sem entregas (ex: 2026 recém-iniciado)
     apareçam no output e gerem ruído no cálculo do score.
@@ -177,28 +309,24 @@ def _filtrar_anos_sem_dados(df: pd.DataFrame) -> pd.DataFrame:
     Um município que entregou RREO mas não tem RGF ainda é mantido
     (tem receita_prevista, só não tem lliq) — isso é dado real, não ausência.
     """
-    colunas_indicadores = [
-        "receita_prevista", "receita_realizada", "despesa_liquidada",
-        "rrestos_nao_processados", "rrestos_processados",
-        "dcl_apos_rp_total", "dcl_pre_rp_total",
-    ]
-    cols_presentes = [c for c in colunas_indicadores if c in df.columns]
+    # Linha "fantasma": todos os indicadores são NULL → município não entregou nada
+    fantasma = f"COALESCE({', '.join(COLUNAS_INDICADORES)}) IS NULL"
 
-    # Linha "fantasma": todos os indicadores são NaN → município não entregou nada
-    mask_fantasma = df[cols_presentes].isna().all(axis=1)
-    n_removidas   = mask_fantasma.sum()
+    n_removidas, anos_afetados = con.execute(
+        f"SELECT COUNT(*), LIST(DISTINCT ano ORDER BY ano) FROM indicadores WHERE {fantasma}"
+    ).fetchone()
 
     if n_removidas:
-        anos_afetados = sorted(df.loc[mask_fantasma, "ano"].unique())
         print(f"\n  🧹 {n_removidas} linhas sem dados removidas "
               f"(anos sem entregas: {anos_afetados})")
-
-    return df[~mask_fantasma].reset_index(drop=True)
+        con.execute(f"DELETE FROM indicadores WHERE {fantasma}")
 
 
 def run() -> pd.DataFrame:
     """
     Executa o motor analítico DuckDB e salva processed/siconfi_indicadores_pb.csv.
+    Indicadores, Lliq e filtro de anos vazios são calculados no próprio SQL e o
+    CSV sai direto do DuckDB (COPY); o pandas só relê esse CSV para o retorno.
     Retorna o DataFrame com todos os indicadores calculados.
     """
     for path, label in [
@@ -206,91 +334,65 @@ def run() -> pd.DataFrame:
         (CSV_RGF,        "RGF"),
         (CSV_MUNICIPIOS, "Municípios"),
     ]:
-        if not path.exists():
+        if not path.exists() and not path.with_suffix(".parquet").exists():
             raise FileNotFoundError(
                 f"Arquivo {label} não encontrado: {path}\n"
                 "Execute primeiro: python src/collectors/siconfi.py"
             )
 
+    # ── Atalho: entradas iguais às do último processamento ────────────────────
+    # Apagar processed/siconfi_indicadores_pb.hash força o reprocessamento.
+    assinatura = _assinatura_entradas()
+    if (assinatura and OUT.exists() and OUT.with_suffix(".parquet").exists() and OUT_HASH.exists()
+            and OUT_HASH.read_text().strip() == assinatura):
+        print(f"Entradas SICONFI sem mudanças — {OUT.name} reaproveitado.")
+        return pd.read_csv(OUT)
+
     print("Executando motor analítico DuckDB...")
     con = duckdb.connect()
 
-    df = con.execute(QUERY, {
-        "csv_rreo":       str(CSV_RREO),
-        "csv_rgf":        str(CSV_RGF),
-        "csv_municipios": str(CSV_MUNICIPIOS),
-    }).df()
-
-    print("Calculando indicadores...")
-
-    df["entregou_rreo"] = df["receita_prevista"].notna()
-
-    df["eorcam"] = df.apply(
-        lambda r: round(r["receita_realizada"] / r["receita_prevista"] * 100, 2)
-        if pd.notnull(r["receita_prevista"]) and r["receita_prevista"] > 0 else None,
-        axis=1,
-    )
-
-    df["rrestos_nproc_pct"] = df.apply(
-        lambda r: round(r["rrestos_nao_processados"] / r["receita_realizada"] * 100, 2)
-        if pd.notnull(r["rrestos_nao_processados"]) and pd.notnull(r["receita_realizada"])
-           and r["receita_realizada"] > 0 else None,
-        axis=1,
-    )
-
-    df["rproc_pct"] = df.apply(
-        lambda r: round(r["rrestos_processados"] / r["receita_realizada"] * 100, 2)
-        if pd.notnull(r["rrestos_processados"]) and pd.notnull(r["receita_realizada"])
-           and r["receita_realizada"] > 0 else None,
-        axis=1,
-    )
-
-    df["deficit_pct"] = df.apply(
-        lambda r: round((r["despesa_liquidada"] - r["receita_realizada"]) / r["receita_realizada"] * 100, 2)
-        if pd.notnull(r["receita_realizada"]) and r["receita_realizada"] > 0 else None,
-        axis=1,
-    )
-
-    # ── Lliq v6.1 ─────────────────────────────────────────────────────────────
-    def _calcular_lliq(row):
-        rec = row["receita_realizada"]
-        if pd.isna(rec) or rec <= 0:
-            return None, None, False
-
-        if pd.notnull(row["dcl_apos_rp_total"]):
-            rpps       = row["dcl_apos_rp_rpps"] if pd.notnull(row["dcl_apos_rp_rpps"]) else 0.0
-            lliq_bruta = row["dcl_apos_rp_total"] - rpps
-            return round(lliq_bruta / rec, 6), lliq_bruta, False
-
-        if pd.notnull(row["dcl_pre_rp_total"]):
-            rpps       = row["dcl_pre_rp_rpps"] if pd.notnull(row["dcl_pre_rp_rpps"]) else 0.0
-            lliq_bruta = row["dcl_pre_rp_total"] - rpps
-            return round(lliq_bruta / rec, 6), lliq_bruta, True
-
-        return None, None, False
-
-    resultado          = df.apply(_calcular_lliq, axis=1, result_type="expand")
-    df["lliq"]         = resultado[0]
-    df["lliq_bruta"]   = resultado[1]
-    df["lliq_parcial"] = resultado[2]
+    for sql, (fonte, arq) in [
+        (CARGA_RREO,       _fonte(CSV_RREO, LEITOR_CSV_RREO)),
+        (CARGA_RGF,        _fonte(CSV_RGF,  LEITOR_CSV_RGF)),
+        (CARGA_MUNICIPIOS, ("", CSV_MUNICIPIOS)),
+    ]:
+        con.execute(sql.format(fonte=fonte), {"arq": str(arq)})
+
+    con.execute(f"CREATE TEMP TABLE indicadores AS {QUERY}")
 
     # ── Remove anos completamente sem dados ───────────────────────────────────
-    df = _filtrar_anos_sem_dados(df)
+    _filtrar_anos_sem_dados(con)
 
     # ── Exportação ────────────────────────────────────────────────────────────
-    df.to_csv(OUT, index=False, encoding="utf-8")
+    destino = str(OUT).replace("'", "''")
+    con.execute(f"COPY indicadores TO '{destino}' (HEADER, DELIMITER ',')")
+    # Parquet ao lado, gravado depois do CSV (nunca mais antigo que ele): é o
+    # que o solvency.py lê, já com os tipos do DuckDB
+    destino_pq = str(OUT.with_suffix(".parquet")).replace("'", "''")
+    con.execute(f"COPY indicadores TO '{destino_pq}' (FORMAT PARQUET, COMPRESSION ZSTD)")
+    if assinatura:
+        OUT_HASH.write_text(assinatura)
+    else:
+        OUT_HASH.unlink(missing_ok=True)
+
+    n, n_mun, anos, n_rreo, n_lliq, n_parcial, n_rproc = con.execute("""
+        SELECT COUNT(*), COUNT(DISTINCT cod_ibge), LIST(DISTINCT ano ORDER BY ano),
+               COUNT(*) FILTER (entregou_rreo), COUNT(lliq),
+               COUNT(*) FILTER (lliq_parcial),  COUNT(rproc_pct)
+        FROM indicadores
+    """).fetchone()
 
     print(f"\n✅ Salvo: {OUT.name}")
-    print(f"   Malha total     : {len(df)} linhas")
-    print(f"   Municípios      : {df['cod_ibge'].nunique()}")
-    print(f"   Anos            : {sorted(df['ano'].unique())}")
-    print(f"   Com RREO        : {df['entregou_rreo'].sum()} linhas")
-    print(f"   Com lliq        : {df['lliq'].notna().sum()} linhas (primário pós-RPNP)")
-    print(f"   Com lliq parcial: {df['lliq_parcial'].sum()} linhas (fallback pré-RPNP)")
-    print(f"   Com rproc_pct   : {df['rproc_pct'].notna().sum()} linhas")
-    print(f"   Sem lliq        : {df['lliq'].isna().sum()} linhas")
-
-    if df["rproc_pct"].isna().all():
+    print(f"   Malha total     : {n} linhas")
+    print(f"   Municípios      : {n_mun}")
+    print(f"   Anos            : {anos}")
+    print(f"   Com RREO        : {n_rreo} linhas")
+    print(f"   Com lliq        : {n_lliq} linhas (primário pós-RPNP)")
+    print(f"   Com lliq parcial: {n_parcial} linhas (fallback pré-RPNP)")
+    print(f"   Com rproc_pct   : {n_rproc} linhas")
+    print(f"   Sem lliq        : {n - n_lliq} linhas")
+
+    if not n_rproc:
         print("\n⚠️  rproc_pct veio todo NULL — inspecione os nomes exatos com:")
         print("   python -c \"import duckdb")
         print("   con = duckdb.connect()")
@@ -301,14 +403,18 @@ def run() -> pd.DataFrame:
         print("         LIMIT 20\\\").df())\"")
 
     print("\nAmostra — Patos (2510808) e Sousa (2516201):")
-    amostra = df[df["cod_ibge"].astype(str).isin(["2510808", "2516201"])]
-    print(amostra[[
-        "ano", "instituicao", "eorcam", "rproc_pct", "rrestos_nproc_pct",
-        "lliq", "lliq_parcial", "periodicidade_rgf", "periodo_rgf"
-    ]].to_string(index=False))
+    amostra = con.execute("""
+        SELECT ano, instituicao, eorcam, rproc_pct, rrestos_nproc_pct,
+               lliq, lliq_parcial, periodicidade_rgf, periodo_rgf
+        FROM indicadores
+        WHERE cod_ibge IN (2510808, 2516201)
+    """).df()
+    print(amostra.to_string(index=False))
 
-    return df
+    # Retorno lido do CSV gravado: quem chama recebe os mesmos tipos e
+    # valores do arquivo que o solvency.py vai ler
+    return pd.read_csv(OUT)
 
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    run()
@@ -8,9 +8,11 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+import duckdb
 import pandas as pd
 import numpy as np
 from utils.paths import PROCESSED
+from utils.io import origem_tabela
 from scorers.config import PESOS, LIMIAR_AUTONOMIA_CRIT
 
 # Parâmetros sigmoid calibrados com dados 2020–2024 da PB.
@@ -30,6 +32,29 @@ def _porte(pop: int) -> str:
     return "grande"
 
 
+# Porte pelos mesmos cortes de _porte e sigmoid no próprio SQL: a leitura do
+# DCA, o join com os municípios e a pontuação saem numa consulta só.
+QUERY_AUTONOMIA = """
+WITH pontuado AS (
+    SELECT
+        d.cod_ibge,
+        d.autonomia_media,
+        ROUND(1.0 / (1.0 + exp(-p.k * (d.autonomia_media - p.mu))), 4) AS autonomia_norm
+    FROM {leitor} d
+    LEFT JOIN mun m USING (cod_ibge)
+    LEFT JOIN params p ON p.porte = CASE
+        WHEN m.populacao <  10000 THEN 'micro'
+        WHEN m.populacao <  50000 THEN 'pequeno'
+        WHEN m.populacao < 200000 THEN 'médio'
+        WHEN m.populacao IS NOT NULL THEN 'grande'
+    END
+)
+SELECT *, ROUND($peso * autonomia_norm, 4) AS contrib_autonomia
+FROM pontuado
+ORDER BY cod_ibge
+"""
+
+
 def pontuar_autonomia(x, pop: int):
     """
     Receita tributária própria / Receita Corrente Total → [0.0, 1.0].
@@ -61,12 +86,19 @@ def carregar_dca(municipios: pd.DataFrame) -> pd.DataFrame:
             "Execute src/collectors/dca.py primeiro."
         )
 
-    dca = pd.read_csv(caminho, dtype={"cod_ibge": str})
-    dca = dca.merge(municipios[["cod_ibge", "populacao"]], on="cod_ibge", how="left")
-
-    dca["autonomia_norm"]    = dca.apply(
-        lambda r: pontuar_autonomia(r["autonomia_media"], r["populacao"]), axis=1
+    origem = origem_tabela(caminho)
+    leitor = ("read_parquet($arq)" if origem.suffix == ".parquet"
+              else "read_csv($arq, types={'cod_ibge': 'VARCHAR'})")
+    params = pd.DataFrame(
+        [(porte, mu, k) for porte, (mu, k) in SIGMOID_PARAMS.items()],
+        columns=["porte", "mu", "k"],
     )
-    dca["contrib_autonomia"] = (PESOS["autonomia"] * dca["autonomia_norm"]).round(4)
 
-    return dca[["cod_ibge", "autonomia_media", "autonomia_norm", "contrib_autonomia"]]
+    con = duckdb.connect()
+    con.register("mun",    municipios[["cod_ibge", "populacao"]])
+    con.register("params", params)
+    dca = con.execute(QUERY_AUTONOMIA.format(leitor=leitor),
+                      {"arq": str(origem), "peso": PESOS["autonomia"]}).df()
+    con.close()
+
+    return dca
@@ -2,6 +2,7 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+import numpy as np
 import pandas as pd
 from scorers.config import PESOS, PENDENCIAS_GRAVES, PENDENCIAS_MODERADAS
 
@@ -20,20 +21,51 @@ def pontuar_ccauc(s) -> float:
         return 1.0
     if s.strip() == "REGULAR":
         return 0.0
-    itens = [p.strip() for p in s.split("|")]
-    if any(i in PENDENCIAS_GRAVES for i in itens):
+    itens = list(map(str.strip, s.split("|")))
+    if not PENDENCIAS_GRAVES.isdisjoint(itens):
         return 1.0
-    n_mod  = sum(1 for i in itens if i in PENDENCIAS_MODERADAS)
-    n_leve = sum(1 for i in itens if i not in PENDENCIAS_MODERADAS)
+    # Contagem sobre a lista (não sobre um conjunto): pendência repetida conta duas vezes
+    n_mod  = sum(map(PENDENCIAS_MODERADAS.__contains__, itens))
+    n_leve = len(itens) - n_mod
     return round(min((n_mod * 2 + n_leve) / 20, 0.5), 4)
 
 
+def _pontuar_ccauc_vec(s: pd.Series) -> pd.Series:
+    """
+    pontuar_ccauc para a coluna inteira. As pendências são quebradas uma vez
+    (split + explode) e fatoradas: só o vocabulário distinto passa pelos
+    conjuntos de config, e as contagens por linha saem de np.bincount sobre
+    o tipo de cada item. Nulo → 1.0, como na versão escalar.
+    """
+    s       = s.reset_index(drop=True)
+    texto   = s.notna().to_numpy()
+    regular = s.str.strip().eq("REGULAR").to_numpy()
+    itens   = s[texto].str.split("|").explode().str.strip().fillna("")
+
+    # Tipo por item do vocabulário: 0 = grave, 1 = moderada, 2 = leve
+    codigos, vocab = pd.factorize(itens)
+    tipo  = np.where(vocab.isin(PENDENCIAS_GRAVES), 0,
+            np.where(vocab.isin(PENDENCIAS_MODERADAS), 1, 2))[codigos]
+    linha = itens.index.to_numpy()
+
+    n      = len(s)
+    grave  = np.bincount(linha[tipo == 0], minlength=n) > 0
+    n_mod  = np.bincount(linha[tipo == 1], minlength=n)
+    n_leve = np.bincount(linha[tipo != 1], minlength=n)
+    ccauc  = np.select(
+        [~texto, regular, grave],
+        [1.0, 0.0, 1.0],
+        default=np.minimum((n_mod * 2 + n_leve) / 20, 0.5),
+    )
+    return pd.Series(np.round(ccauc, 4), index=s.index)
+
+
 def calcular(df_ca: pd.DataFrame) -> pd.DataFrame:
     """
     Entrada : df_ca com colunas [cod_ibge, pendencias]
     Saída   : DataFrame [cod_ibge, ccauc, contrib_ccauc]
     """
-    df = df_ca[["cod_ibge", "pendencias"]].copy()
-    df["ccauc"]        = df["pendencias"].apply(pontuar_ccauc)
+    df = df_ca[["cod_ibge", "pendencias"]].reset_index(drop=True)
+    df["ccauc"]        = _pontuar_ccauc_vec(df["pendencias"])
     df["contrib_ccauc"] = (PESOS["ccauc"] * (1 - df["ccauc"])).round(4)
     return df[["cod_ibge", "ccauc", "contrib_ccauc"]]
@@ -42,17 +42,17 @@ LIMIAR_LLIQ_SUSPEITO   = -0.50  # abaixo = dado_suspeito
 JANELA_RGF_BIMESTRAL   = 90     # dias — municípios > 50k hab
 JANELA_RGF_SEMESTRAL   = 210    # dias — municípios ≤ 50k hab
 
-PENDENCIAS_GRAVES = {
+PENDENCIAS_GRAVES = frozenset({
     "Regularidade Fiscal (RFB)", "Regularidade PGFN", "CADIN",
     "SISTN (Dívida Consolidada)", "LRF - Limite Pessoal Executivo",
     "Adimplência TCU", "Adimplência CGU",
-}
-PENDENCIAS_MODERADAS = {
+})
+PENDENCIAS_MODERADAS = frozenset({
     "Regularidade FGTS", "Regularidade Trabalhista (TST)",
     "SIOPS (Saúde)", "SIOPE (Educação)",
     "SICONV/TRANSFEREGOV Prestação de Contas",
     "SISTN (Garantias)", "LRF - Limite Pessoal Legislativo",
-}
+})
 
 FIM_PERIODO_MES = {
     ("Q", 1): 4, ("Q", 2): 8, ("Q", 3): 12,
@@ -2,8 +2,10 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+import numpy as np
 import pandas as pd
 from scorers.config import PESOS, ANOS_REF, PESOS_ANO
+from utils.arredondamento import arredondar
 
 
 def pontuar_eorcam(x: float):
@@ -24,6 +26,20 @@ def pontuar_eorcam(x: float):
     return 0.0
 
 
+def _pontuar_eorcam_vec(s: pd.Series) -> pd.Series:
+    """
+    pontuar_eorcam aplicada à coluna inteira de uma vez (mesmas faixas e
+    mesmo arredondamento, via utils.arredondamento). NaN sai como NaN.
+    """
+    x   = s.to_numpy(dtype=float)
+    out = np.select(
+        [np.isnan(x), (x >= 90) & (x <= 105), x > 120, x > 105, x >= 70],
+        [np.nan, 1.0, 0.5, arredondar(1.0 - (x - 105) / 30), arredondar((x - 70) / 20)],
+        default=0.0,
+    )
+    return pd.Series(out, index=s.index)
+
+
 def calcular(df_si: pd.DataFrame) -> pd.DataFrame:
     """
     Média ponderada por recência (PESOS_ANO). 2020 tem peso 0 —
@@ -42,16 +58,14 @@ def calcular(df_si: pd.DataFrame) -> pd.DataFrame:
     df_eo = df_eo[df_eo["peso_ano"] > 0]
     df_eo["eorcam_w"] = df_eo["eorcam"] * df_eo["peso_ano"]
 
+    # Somas por grupo em uma passada; divisão e arredondamento na coluna toda
+    somas     = df_eo.groupby("cod_ibge", observed=True)[["eorcam_w", "peso_ano"]].sum()
     df_result = (
-        df_eo.groupby("cod_ibge")
-        .apply(
-            lambda g: round(g["eorcam_w"].sum() / g["peso_ano"].sum(), 4),
-            include_groups=False,
-        )
+        (somas["eorcam_w"] / somas["peso_ano"]).round(4)
+        .rename("eorcam_raw")
         .reset_index()
-        .rename(columns={0: "eorcam_raw"})
     )
 
-    df_result["eorcam_norm"]    = df_result["eorcam_raw"].apply(pontuar_eorcam)
+    df_result["eorcam_norm"]    = _pontuar_eorcam_vec(df_result["eorcam_raw"])
     df_result["contrib_eorcam"] = (PESOS["eorcam"] * df_result["eorcam_norm"].fillna(0)).round(4)
     return df_result[["cod_ibge", "eorcam_raw", "eorcam_norm", "contrib_eorcam"]]
@@ -2,6 +2,7 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+import numpy as np
 import pandas as pd
 from datetime import date
 from scorers.config import (
@@ -10,6 +11,7 @@ from scorers.config import (
     JANELA_RGF_BIMESTRAL, JANELA_RGF_SEMESTRAL,
     FIM_PERIODO_MES,
 )
+from utils.arredondamento import arredondar
 
 # Calculado no momento da execução, não como constante de módulo
 HOJE = date.today()
@@ -48,6 +50,21 @@ def pontuar_lliq(x: float):
     return round(max(0.0, (x + 0.50) / 0.50 * 0.35), 4)
 
 
+def _pontuar_lliq_vec(s: pd.Series) -> pd.Series:
+    """
+    pontuar_lliq aplicada à coluna inteira de uma vez (mesma curva v7.0 e
+    mesmo arredondamento do round escalar, inclusive nos meio-termos).
+    NaN atravessa o cap e as comparações e sai como NaN.
+    """
+    x   = np.maximum(s.to_numpy(dtype=float), LIMIAR_LLIQ_SUSPEITO)
+    out = np.select(
+        [x >= 0.35, x >= 0.10, x >= 0.00],
+        [1.00, 0.60 + (x - 0.10) / 0.25 * 0.40, 0.35 + (x / 0.10) * 0.25],
+        default=np.maximum(0.0, (x + 0.50) / 0.50 * 0.35),
+    )
+    return pd.Series(arredondar(out, 4), index=s.index)
+
+
 def _dias_atraso(ano, periodo, periodicidade) -> int:
     """
     Dias desde a data esperada de publicação do RGF mais recente.
@@ -102,7 +119,7 @@ def calcular(df_si: pd.DataFrame, df_mu: pd.DataFrame) -> pd.DataFrame:
             ["cod_ibge", "ano", "_per_sort", "_prior_per"],
             ascending=[True, False, False, False],
         )
-        .groupby("cod_ibge")
+        .groupby("cod_ibge", observed=True)
         .first()
         .reset_index()
         [["cod_ibge", "lliq", "ano", "periodo_rgf", "periodicidade_rgf", "lliq_parcial"]]
@@ -116,7 +133,7 @@ def calcular(df_si: pd.DataFrame, df_mu: pd.DataFrame) -> pd.DataFrame:
 
     df_base = df_base.merge(df_mu[["cod_ibge", "populacao"]], on="cod_ibge", how="left")
 
-    df_base["lliq_norm"]        = df_base["lliq_raw"].apply(pontuar_lliq)
+    df_base["lliq_norm"]        = _pontuar_lliq_vec(df_base["lliq_raw"])
     df_base["dado_suspeito_lliq"] = (
         df_base["lliq_raw"].notna() & (df_base["lliq_raw"] < LIMIAR_LLIQ_SUSPEITO)
     )
@@ -125,15 +142,15 @@ def calcular(df_si: pd.DataFrame, df_mu: pd.DataFrame) -> pd.DataFrame:
         if pd.notnull(r.get("lliq_ano")) else 999,
         axis=1,
     )
-    df_base["decay_fator"] = df_base.apply(
-        lambda r: _decay(r["dias_atraso"], r["populacao"]), axis=1
-    )
-    df_base["dado_defasado"] = df_base.apply(
-        lambda r: r["dias_atraso"] > (
-            JANELA_RGF_BIMESTRAL if r["populacao"] > 50_000 else JANELA_RGF_SEMESTRAL
-        ),
-        axis=1,
+    # _decay e a flag de defasagem na coluna inteira: janela por porte e
+    # decaimento sem ramos por linha (mesmos valores de _decay)
+    dias   = df_base["dias_atraso"].to_numpy(dtype=float)
+    janela = np.where(df_base["populacao"].to_numpy(dtype=float) > 50_000,
+                      JANELA_RGF_BIMESTRAL, JANELA_RGF_SEMESTRAL)
+    df_base["decay_fator"]   = np.where(
+        dias <= janela, 1.00, np.round(np.maximum(0.0, 1.0 - (dias - janela) / 365.0), 4)
     )
+    df_base["dado_defasado"] = dias > janela
     df_base["contrib_lliq"] = (
         (PESOS["lliq"] * df_base["lliq_norm"].fillna(0)) * df_base["decay_fator"]
     ).round(4)
@@ -14,12 +14,17 @@ def calcular(df_si: pd.DataFrame) -> pd.DataFrame:
     Entrada : df_si com colunas [cod_ibge, ano, entregou_rreo]
     Saída   : DataFrame [cod_ibge, anos_entregues, qsiconfi, contrib_qsiconfi]
     """
-    df_qsi = (
+    # Uma agregação só; qsiconfi e contrib saem da Series de contagens e o
+    # DataFrame é montado uma vez no fim
+    anos_entregues = (
         df_si[df_si["ano"].isin(ANOS_REF)]
-        .groupby("cod_ibge")["entregou_rreo"]
-        .agg(anos_entregues="sum")
-        .reset_index()
+        .groupby("cod_ibge", sort=False, observed=True)["entregou_rreo"]
+        .sum()
     )
-    df_qsi["qsiconfi"]         = df_qsi["anos_entregues"] / N_ANOS
-    df_qsi["contrib_qsiconfi"] = (PESOS["qsiconfi"] * df_qsi["qsiconfi"]).round(4)
-    return df_qsi[["cod_ibge", "anos_entregues", "qsiconfi", "contrib_qsiconfi"]]
+    qsiconfi = anos_entregues / N_ANOS
+    return pd.DataFrame({
+        "cod_ibge"         : anos_entregues.index,
+        "anos_entregues"   : anos_entregues.to_numpy(),
+        "qsiconfi"         : qsiconfi.to_numpy(),
+        "contrib_qsiconfi" : (PESOS["qsiconfi"] * qsiconfi).round(4).to_numpy(),
+    })
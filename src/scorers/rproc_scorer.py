@@ -6,6 +6,10 @@ import pandas as pd
 from scorers.config import PESOS, ANOS_REF, LIMIAR_RPROC_CRONICO, N_ANOS_CRONICOS_CAP_MEDIO
 
 
+# Anos crônicos → rproc_norm (fora da tabela → 0.00)
+CURVA_RPROC = {0: 1.00, 1: 0.75, 2: 0.50, 3: 0.30, 4: 0.10, 5: 0.00, 6: 0.00}
+
+
 def pontuar_rproc_cronico(n: int) -> float:
     """
     Penaliza o padrão histórico de manter RP Processados > 3% da receita.
@@ -23,8 +27,7 @@ def pontuar_rproc_cronico(n: int) -> float:
       não episódio isolado. O cap em ≥5 permitia que municípios com 4 anos
       crônicos atingissem 🟢 Risco Baixo via outros componentes.
     """
-    mapa = {0: 1.00, 1: 0.75, 2: 0.50, 3: 0.30, 4: 0.10, 5: 0.00, 6: 0.00}
-    return mapa.get(int(n), 0.00)
+    return CURVA_RPROC.get(int(n), 0.00)
 
 
 def calcular(df_si: pd.DataFrame) -> pd.DataFrame:
@@ -38,17 +41,17 @@ def calcular(df_si: pd.DataFrame) -> pd.DataFrame:
     O cap duro de classificação (N_ANOS_CRONICOS_CAP_MEDIO = 4) é lido do
     config e aplicado exclusivamente no engine/classifier.py.
     """
+    validos = df_si[
+        df_si["ano"].isin(ANOS_REF) &
+        df_si["entregou_rreo"] &
+        df_si["rproc_pct"].notna()
+    ]
     df_rp = (
-        df_si[
-            df_si["ano"].isin(ANOS_REF) &
-            df_si["entregou_rreo"] &
-            df_si["rproc_pct"].notna()
-        ]
-        .groupby("cod_ibge")["rproc_pct"]
-        .apply(lambda s: int((s > LIMIAR_RPROC_CRONICO).sum()))
+        (validos["rproc_pct"] > LIMIAR_RPROC_CRONICO)
+        .groupby(validos["cod_ibge"], observed=True).sum()
+        .rename("n_anos_cronicos")
         .reset_index()
-        .rename(columns={"rproc_pct": "n_anos_cronicos"})
     )
-    df_rp["rproc_norm"]    = df_rp["n_anos_cronicos"].apply(pontuar_rproc_cronico)
+    df_rp["rproc_norm"]    = df_rp["n_anos_cronicos"].map(CURVA_RPROC).fillna(0.00)
     df_rp["contrib_rproc"] = (PESOS["rproc"] * df_rp["rproc_norm"]).round(4)
     return df_rp[["cod_ibge", "n_anos_cronicos", "rproc_norm", "contrib_rproc"]]
@@ -0,0 +1,15 @@
+import numpy as np
+
+
+def arredondar(x: np.ndarray, casas: int = 4) -> np.ndarray:
+    """
+    round(v, casas) do Python aplicado a um array. np.round escala por
+    10**casas e pode desempatar diferente quando v fica a um ulp do
+    meio-termo; só esses quase-empates passam pelo round escalar.
+    NaN atravessa como NaN.
+    """
+    escala = x * 10.0 ** casas
+    out    = np.round(x, casas)
+    empate = np.abs(escala - np.floor(escala) - 0.5) < 1e-6
+    out[empate] = [round(float(v), casas) for v in x[empate]]
+    return out
@@ -1,4 +1,8 @@
+import io
+import os
 import pandas as pd
+import pyarrow as pa
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 
@@ -10,3 +14,57 @@ def salvar_csv(df: pd.DataFrame, caminho: Path, verbose: bool = True) -> None:
     df.to_csv(caminho, index=False, encoding="utf-8-sig")
     if verbose:
         print(f"  ✅ Salvo: {caminho.name} ({len(df)} linhas)")
+
+
+def origem_tabela(caminho: Path) -> Path:
+    """
+    O Parquet gravado ao lado do CSV, se existir e não for mais antigo que
+    ele; senão o próprio CSV.
+    """
+    parquet = caminho.with_suffix(".parquet")
+    if parquet.exists() and (not caminho.exists()
+                             or parquet.stat().st_mtime >= caminho.stat().st_mtime):
+        return parquet
+    return caminho
+
+
+def ler_tabela(caminho: Path, **kwargs) -> pd.DataFrame:
+    """
+    Lê a tabela de origem_tabela: Parquet se disponível, senão o CSV
+    (kwargs vão para read_csv). No Parquet, um dtype por coluna também é
+    aplicado, para que os dois caminhos devolvam os mesmos tipos.
+    """
+    origem = origem_tabela(caminho)
+    if origem.suffix != ".parquet":
+        return pd.read_csv(origem, **kwargs)
+    df    = pd.read_parquet(origem)
+    tipos = kwargs.get("dtype")
+    if isinstance(tipos, dict):
+        # Coluna que já é texto fica como está (astype(str) viraria nulo em "None")
+        df = df.astype({c: t for c, t in tipos.items() if c in df.columns
+                        and not (t is str and pd.api.types.is_string_dtype(df[c].dtype))})
+    return df
+
+
+def salvar_tabela(df: pd.DataFrame, caminho: Path, **kwargs) -> None:
+    """Grava o CSV (kwargs vão para to_csv) e uma cópia Parquet/zstd ao lado."""
+    df.to_csv(caminho, index=False, **kwargs)
+    df.to_parquet(caminho.with_suffix(".parquet"), compression="zstd", index=False)
+
+
+def ler_linhas_zst(caminho: Path) -> Iterator[bytes]:
+    """Linhas (em bytes) de um JSONL comprimido com zstd."""
+    with pa.input_stream(str(caminho), compression="zstd") as fonte:
+        yield from io.BufferedReader(fonte)
+
+
+def salvar_linhas_zst(caminho: Path, linhas: Iterable[bytes]) -> None:
+    """
+    Grava as linhas como um JSONL zstd completo. A escrita vai para um
+    .part e só então é renomeada: o arquivo final ou existe inteiro ou não
+    existe, mesmo se a gravação for interrompida.
+    """
+    parcial = caminho.with_name(caminho.name + ".part")
+    with pa.output_stream(str(parcial), compression="zstd") as saida:
+        saida.write(b"".join(linhas))
+    os.replace(parcial, caminho)
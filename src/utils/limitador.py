@@ -0,0 +1,66 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+class LimitadorTaxa:
+    """
+    Token bucket assíncrono: `taxa` fichas/s, acumulando até `capacidade`.
+    A espera só acontece quando o balde está vazio — o tempo gasto na
+    própria requisição já conta para repor fichas.
+
+    Criar dentro do event loop que vai usá-lo (o asyncio.Lock fica preso
+    ao primeiro loop em que houver disputa).
+    """
+
+    def __init__(self, taxa: float, capacidade: float = 1.0):
+        self.taxa       = taxa
+        self.capacidade = capacidade
+        self._fichas    = capacidade
+        self._ultimo    = time.monotonic()
+        self._lock      = asyncio.Lock()
+
+    async def adquirir(self) -> None:
+        async with self._lock:
+            agora        = time.monotonic()
+            self._fichas = min(self.capacidade,
+                               self._fichas + (agora - self._ultimo) * self.taxa)
+            self._ultimo = agora
+            if self._fichas < 1:
+                await asyncio.sleep((1 - self._fichas) / self.taxa)
+                self._fichas = 1.0
+                self._ultimo = time.monotonic()
+            self._fichas -= 1
+
+
+class ControleAdmissao:
+    """
+    Limite de requisições em voo, ajustável em execução (`redimensionar`).
+    Diferente de um Semaphore em volta da tarefa inteira, a vaga é pedida a
+    cada requisição e devolvida logo em seguida: uma tarefa com muitas páginas
+    não segura a vaga entre uma página e outra.
+
+    Criar dentro do event loop que vai usá-lo (mesma restrição do asyncio.Condition).
+    """
+
+    def __init__(self, limite: int):
+        self.limite  = limite
+        self._em_uso = 0
+        self._cond   = asyncio.Condition()
+
+    @asynccontextmanager
+    async def vaga(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._em_uso < self.limite)
+            self._em_uso += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._em_uso -= 1
+                self._cond.notify(1)
+
+    async def redimensionar(self, limite: int) -> None:
+        async with self._cond:
+            self.limite = limite
+            self._cond.notify_all()
@@ -12,14 +12,16 @@ Rodar:
     pytest tests/test_classifier.py -v
 """
 
+import itertools
 import sys
 from pathlib import Path
+import pandas as pd
 import pytest
 
 ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT / "src"))
 
-from engine.classifier import classificar
+from engine.classifier import classificar, classificar_vec, ORDEM_SORT
 
 # ══════════════════════════════════════════════════════════════════════════════
 # Classificação base (sem caps)  —  limiares v7.0: 80 / 60 / 40
@@ -182,3 +184,29 @@ class TestCapsCombinados:
         """2 anos (teto Alto) + 5 crônicos (teto Médio) -> prevalece Alto.
         Score 90 (seria Baixo) -> cai para Alto."""
         assert classificar(90.0, 2, 5) == "🔴 Risco Alto"
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Versão vetorizada (usada pelo solvency.py)
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestClassificarVec:
+    """classificar_vec deve reproduzir classificar linha a linha."""
+
+    def test_equivale_a_classificar_em_grade(self):
+        """Grade de limiares × anos entregues × anos crônicos, com score ausente."""
+        scores = [None, 0.0, 39.9, 40.0, 59.9, 60.0, 79.9, 80.0, 100.0]
+        grade  = pd.DataFrame(
+            list(itertools.product(scores, range(7), range(8))),
+            columns=["score", "anos", "cronicos"],
+        )
+        vetor = classificar_vec(grade["score"], grade["anos"], grade["cronicos"])
+        for linha, classe in zip(grade.itertuples(index=False), vetor):
+            assert classe == classificar(linha.score, linha.anos, linha.cronicos)
+
+    def test_categorica_na_ordem_de_exportacao(self):
+        """Categorias na ordem de ORDEM_SORT, com Sem Dados por último."""
+        vetor = classificar_vec(pd.Series([85.0, None]), pd.Series([6, 6]), pd.Series([0, 0]))
+        assert vetor.cat.ordered
+        assert list(vetor.cat.categories) == list(ORDEM_SORT)
+        assert vetor.tolist() == ["🟢 Risco Baixo", "⚫ Sem Dados"]
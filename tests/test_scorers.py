@@ -22,12 +22,13 @@ import pytest
 ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT / "src"))
 
-from scorers.lliq_scorer     import pontuar_lliq
-from scorers.eorcam_scorer   import pontuar_eorcam, calcular as calcular_eorcam
-from scorers.cauc_scorer     import pontuar_ccauc,  calcular as calcular_cauc
+from scorers.lliq_scorer     import pontuar_lliq, _pontuar_lliq_vec
+from scorers.eorcam_scorer   import pontuar_eorcam, _pontuar_eorcam_vec, calcular as calcular_eorcam
+from scorers.cauc_scorer     import pontuar_ccauc,  _pontuar_ccauc_vec, calcular as calcular_cauc
 from scorers.qsiconfi_scorer import calcular as calcular_qsiconfi
 from scorers.rproc_scorer    import pontuar_rproc_cronico, calcular as calcular_rproc
-from scorers.config          import PESOS
+from scorers.autonomia_scorer import pontuar_autonomia
+from scorers.config          import PESOS, ANOS_REF, LIMIAR_RPROC_CRONICO
 
 FIXTURES = Path(__file__).parent / "fixtures"
 
@@ -83,6 +84,19 @@ class TestLliq:
         assert pontuar_lliq(None) is None
         assert pontuar_lliq(float("nan")) is None
 
+    def test_vetorizada_equivale_inclusive_nos_empates(self):
+        """_pontuar_lliq_vec reproduz pontuar_lliq, inclusive em lliq = −0.4375,
+        onde a faixa negativa cai no meio-termo do arredondamento (0.04375)."""
+        valores = [None, -0.9, -0.5, -0.4395, -0.4375, -0.01, 0.0, 0.067115,
+                   0.1, 0.162712, 0.35, 0.600615]
+        vetor   = _pontuar_lliq_vec(pd.Series(valores, dtype=float))
+        for x, v in zip(valores, vetor):
+            esperado = pontuar_lliq(x)
+            if esperado is None:
+                assert pd.isna(v)
+            else:
+                assert v == esperado
+
     # ── Casos reais dos fixtures ──────────────────────────────────────────────
 
     def test_alagoinha_2023_lliq_alto(self):
@@ -154,6 +168,19 @@ class TestEorcam:
         """Aguiar 2024: eorcam=127.17 -> teto 0.5."""
         assert pontuar_eorcam(127.17) == 0.5
 
+    def test_vetorizada_equivale_inclusive_nos_empates(self):
+        """_pontuar_eorcam_vec reproduz pontuar_eorcam, inclusive em x = 70.125,
+        onde (x − 70)/20 = 0.00625 cai no meio-termo do arredondamento."""
+        valores = [None, 0.0, 69.99, 70.0, 70.125, 71.247, 80.0, 89.99, 90.0,
+                   105.0, 105.0001, 112.5, 119.9999, 120.0, 120.01, 152.71]
+        vetor   = _pontuar_eorcam_vec(pd.Series(valores, dtype=float))
+        for x, v in zip(valores, vetor):
+            esperado = pontuar_eorcam(x)
+            if esperado is None:
+                assert pd.isna(v)
+            else:
+                assert v == esperado
+
     def test_agua_branca_sem_rreo_nao_aparece(self):
         """Água Branca nunca entregou RREO — não deve aparecer no resultado."""
         result = calcular_eorcam(carregar_siconfi())
@@ -196,6 +223,21 @@ class TestCauc:
         assert pontuar_ccauc(None)          == 1.0
         assert pontuar_ccauc(float("nan")) == 1.0
 
+    def test_vetorizada_equivale_a_escalar(self):
+        """_pontuar_ccauc_vec reproduz pontuar_ccauc: nulos, REGULAR com espaços,
+        grave no meio da lista, moderada repetida, leves e o teto de 0.5."""
+        valores = [
+            None, float("nan"), "REGULAR", "  REGULAR ", "",
+            "CADIN", "Regularidade FGTS | CADIN",
+            "Regularidade FGTS", "Regularidade FGTS | Regularidade FGTS",
+            "SICONFI RREO | SICONFI PCASP",
+            "SIOPS (Saúde) | SICONFI RREO | SIOPE (Educação)",
+            " | ".join(["SIOPS (Saúde)"] * 6 + ["SICONFI RREO"] * 3),
+            *carregar_cauc()["pendencias"],
+        ]
+        vetor = _pontuar_ccauc_vec(pd.Series(valores, dtype=object))
+        assert vetor.tolist() == [pontuar_ccauc(v) for v in valores]
+
     def test_agua_branca_contrib_zero(self):
         """Água Branca tem RFB + CADIN (graves) -> contrib = 0."""
         result = calcular_cauc(carregar_cauc())
@@ -282,6 +324,23 @@ class TestRproc:
         assert pontuar_rproc_cronico(5) == 0.00
         assert pontuar_rproc_cronico(6) == 0.00
 
+    def test_agrupada_equivale_a_contagem_por_municipio(self):
+        """calcular conta os anos crônicos por município igual à contagem
+        linha a linha + pontuar_rproc_cronico (exclui anos sem RREO,
+        rproc_pct nulo e anos fora de ANOS_REF)."""
+        df_si  = carregar_siconfi()
+        result = calcular_rproc(df_si).set_index("cod_ibge")
+        for cod, grupo in df_si.groupby("cod_ibge"):
+            validos = grupo[grupo["ano"].isin(ANOS_REF) & grupo["entregou_rreo"]
+                            & grupo["rproc_pct"].notna()]
+            if validos.empty:
+                assert cod not in result.index
+                continue
+            n = int((validos["rproc_pct"] > LIMIAR_RPROC_CRONICO).sum())
+            assert result.loc[cod, "n_anos_cronicos"] == n
+            assert result.loc[cod, "rproc_norm"]      == pontuar_rproc_cronico(n)
+            assert result.loc[cod, "contrib_rproc"]   == round(PESOS["rproc"] * pontuar_rproc_cronico(n), 4)
+
     def test_alagoa_grande_3_anos_cronicos(self):
         """Alagoa Grande: rproc_pct > 3% em 2020 (4.08), 2021 (3.89), 2022 (3.13)
         -> n_anos_cronicos = 3."""
@@ -300,3 +359,39 @@ class TestRproc:
         result = calcular_rproc(carregar_siconfi())
         assert (result["contrib_rproc"] >= 0).all()
         assert (result["contrib_rproc"] <= PESOS["rproc"]).all()
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# AUTONOMIA — Autonomia Tributária
+# ══════════════════════════════════════════════════════════════════════════════
+
+class TestAutonomia:
+
+    def test_query_equivale_a_escalar(self, tmp_path, monkeypatch):
+        """QUERY_AUTONOMIA (porte e sigmoid no SQL) reproduz pontuar_autonomia
+        em cada corte de porte, com autonomia nula e com município fora de mun."""
+        import scorers.autonomia_scorer as autonomia_scorer
+
+        pops = {"2500001": 9_999,  "2500002": 10_000,
+                "2500003": 49_999, "2500004": 50_000,
+                "2500005": 199_999, "2500006": 200_000,
+                "2500007": 12_000}
+        dca  = pd.DataFrame({
+            "cod_ibge":        [*pops, "2509999"],
+            "autonomia_media": [0.01, 0.03, 0.028, 0.05, 0.0318, 0.02, None, 0.04],
+        })
+        dca.to_csv(tmp_path / "dca_indicadores_pb.csv", index=False)
+        mun = pd.DataFrame({"cod_ibge": list(pops), "populacao": list(pops.values())})
+        monkeypatch.setattr(autonomia_scorer, "PROCESSED", tmp_path)
+
+        result = autonomia_scorer.carregar_dca(mun).set_index("cod_ibge")
+        assert list(result.index) == sorted(dca["cod_ibge"])
+        for cod, x in zip(dca["cod_ibge"], dca["autonomia_media"]):
+            esperado = pontuar_autonomia(x, pops.get(cod))
+            obtido   = result.loc[cod, "autonomia_norm"]
+            if esperado is None:
+                assert pd.isna(obtido)
+                assert pd.isna(result.loc[cod, "contrib_autonomia"])
+            else:
+                assert obtido == esperado
+                assert result.loc[cod, "contrib_autonomia"] == round(PESOS["autonomia"] * esperado, 4)